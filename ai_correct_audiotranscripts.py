@@ -58,6 +58,7 @@ from openai import OpenAI
 from dotenv import dotenv_values
 from pathlib import Path
 import logging
+import os
 import tiktoken  # Tokenization library for OpenAI models
 import time
 
@@ -72,7 +73,7 @@ TOKEN_BUFFER: int = 200  # Buffer to ensure we stay under the token limit
 # Load OpenAI API key from environment variables
 config = {**dotenv_values(".env"), **dotenv_values(".env2")}  # Merge two .env files
 api_key_used = 'OPENAI_API_KEY_KB_GENERAL'
-api_key = config.get(api_key_used)
+api_key = config.get(api_key_used) or os.environ.get(api_key_used)  # Fall back to the environment
 
 if not api_key:
     logger.error(f"OpenAI API key '{api_key_used}' not found in the environment or .env files.")
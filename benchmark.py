@@ -0,0 +1,501 @@
+"""
+Reproducible Benchmark Suite
+
+=====================
+Description:
+This script benchmarks the video and audio processing functions of this repo on deterministic,
+synthetic media. Input videos are generated with FFmpeg's lavfi sources (testsrc2 video with sine
+or seeded noise audio) in various durations and resolutions, so every run works on identical inputs
+and no real lecture recordings are needed.
+
+Features:
+- Times every function in `tools.py` on every synthetic scenario.
+- Times the Whisper transcription path using a small model (default 'tiny').
+- Times the ChatGPT correction path against a local fake OpenAI server, so no API key or network is needed.
+- Writes machine-readable JSON results, including FFmpeg version and output file sizes.
+- A compare mode that flags timing and output size regressions between two runs.
+
+Run it before upgrading FFmpeg or Whisper, or before changing encode settings, and compare the results
+with a run made afterwards.
+
+Requirements:
+- FFmpeg installed on the system and available in the system's PATH (with libx264, libvpx-vp9 and libopus).
+- The Whisper package for the transcription benchmark (skipped if not installed).
+- The OpenAI and tiktoken packages for the correction benchmark (skipped if not installed).
+
+Usage:
+    python benchmark.py run --output bench_before.json
+    python benchmark.py run --output bench_after.json --scenarios short_480p --repeat 5
+    python benchmark.py compare bench_before.json bench_after.json --threshold 0.10
+
+The compare mode exits with status 1 if any benchmark regressed by more than the threshold.
+
+Latest update: 19 October 2026
+Author: Olaf Janssen (ookgezellig) - Supported by ChatGPT
+License: Creative Commons CC0 - http://creativecommons.org/publicdomain/zero/1.0
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from tools import (create_dir, extract_clip, enhance_audio_in_video, extract_audio, amplify_audio,
+                   compress_and_convert_to_webm, compress_and_convert_to_webm_adaptive,
+                   compress_and_convert_to_dash, add_subtitles_to_webm)
+
+# Synthetic input scenarios: name -> duration (seconds), resolution and audio source
+SCENARIOS: Dict[str, Dict[str, object]] = {
+    'short_480p': {'duration': 10, 'size': '854x480', 'audio': 'sine'},
+    'short_1080p': {'duration': 10, 'size': '1920x1080', 'audio': 'noise'},
+    'medium_720p': {'duration': 60, 'size': '1280x720', 'audio': 'sine'},
+}
+DEFAULT_SCENARIOS: List[str] = ['short_480p', 'medium_720p']
+
+FRAME_RATE: int = 25  # Frame rate of the synthetic videos
+SAMPLE_RATE: int = 44100  # Sample rate of the synthetic audio (enhance_audio_in_video assumes 44.1 kHz)
+RANDOM_SEED: int = 42  # Seed for noise audio and synthetic transcript text
+TRANSCRIPT_WORDS: int = 3000  # Number of words in the synthetic transcript for the correction benchmark
+
+
+#== Synthetic media ==========================
+
+def generate_synthetic_video(output_video: Path, duration: int, size: str, audio: str = 'sine') -> None:
+    """
+    Generates a deterministic MP4 test video using FFmpeg's lavfi sources.
+    Args:
+        output_video (Path): Path where the synthetic MP4 file will be saved.
+        duration (int): Duration of the video in seconds.
+        size (str): Resolution of the video (format: 'WIDTHxHEIGHT').
+        audio (str): Audio source, either 'sine' (440 Hz tone) or 'noise' (seeded pink noise).
+    Returns:
+        None
+    Raises:
+        ValueError: If the audio source is unknown.
+        subprocess.CalledProcessError: If FFmpeg fails to execute.
+    """
+    if audio == 'sine':
+        audio_source = f"sine=frequency=440:sample_rate={SAMPLE_RATE}:duration={duration}"
+    elif audio == 'noise':
+        audio_source = f"anoisesrc=color=pink:sample_rate={SAMPLE_RATE}:amplitude=0.2:seed={RANDOM_SEED}:duration={duration}"
+    else:
+        raise ValueError(f"Unknown audio source '{audio}', use 'sine' or 'noise'.")
+
+    command = [
+        'ffmpeg', '-y',
+        '-f', 'lavfi', '-i', f"testsrc2=size={size}:rate={FRAME_RATE}:duration={duration}",  # Test pattern video
+        '-f', 'lavfi', '-i', audio_source,  # Test audio
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', '128k',
+        '-map_metadata', '-1',  # Strip metadata, so files only depend on the FFmpeg version
+        '-fflags', '+bitexact', '-flags:v', '+bitexact', '-flags:a', '+bitexact',
+        '-shortest',
+        str(output_video)
+    ]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def generate_synthetic_srt(output_srt: Path, duration: int, cue_length: int = 4) -> None:
+    """Writes a simple SRT subtitle file with one numbered cue every `cue_length` seconds."""
+    def timestamp(seconds: int) -> str:
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d},000"
+
+    cues = []
+    for i, start in enumerate(range(0, duration, cue_length), start=1):
+        end = min(start + cue_length, duration)
+        cues.append(f"{i}\n{timestamp(start)} --> {timestamp(end)}\nSynthetic subtitle cue number {i}.\n")
+    output_srt.write_text('\n'.join(cues), encoding='utf-8')
+
+
+def generate_synthetic_transcript(num_words: int) -> str:
+    """Generates a deterministic, transcript-like text of `num_words` words."""
+    vocabulary = ['wikidata', 'the', 'item', 'property', 'query', 'and', 'we', 'can', 'see', 'here', 'so',
+                  'uh', 'statement', 'reference', 'university', 'library', 'data', 'linked', 'open', 'you']
+    rng = random.Random(RANDOM_SEED)
+    sentences = []
+    words_left = num_words
+    while words_left > 0:
+        length = min(rng.randint(6, 20), words_left)
+        sentence = ' '.join(rng.choice(vocabulary) for _ in range(length))
+        sentences.append(sentence.capitalize() + '.')
+        words_left -= length
+    return ' '.join(sentences)
+
+
+#== Fake OpenAI server =======================
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers chat completion requests by echoing the transcript chunk back, after an optional delay."""
+    latency: float = 0.0
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            self.send_error(404)
+            return
+
+        # Echo the chunk that follows the prompt, so the "corrected" transcript equals the input
+        content = request.get('messages', [{}])[-1].get('content', '')
+        content = content.split('Here is the file: ', 1)[-1]
+        time.sleep(self.latency)
+
+        body = json.dumps({
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion',
+            'created': 0,
+            'model': request.get('model', 'fake'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # Keep the benchmark output clean
+
+
+@contextlib.contextmanager
+def fake_openai_server(latency: float = 0.0):
+    """Runs a local fake OpenAI server and points the OpenAI client at it via OPENAI_BASE_URL."""
+    handler = type('Handler', (FakeOpenAIHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    saved_env = {key: os.environ.get(key) for key in ('OPENAI_BASE_URL', 'OPENAI_API_KEY_KB_GENERAL')}
+    os.environ['OPENAI_BASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ.setdefault('OPENAI_API_KEY_KB_GENERAL', 'benchmark')
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+#== Timing helpers ===========================
+
+@contextlib.contextmanager
+def silence_output(enabled: bool = True):
+    """Redirects stdout and stderr at file descriptor level, so FFmpeg child output is hidden as well."""
+    if not enabled:
+        yield
+        return
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_fds = [os.dup(1), os.dup(2)]
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+        os.dup2(devnull.fileno(), 2)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+
+
+def get_output_bytes(output: Path) -> int:
+    """Returns the size of an output file, or the total size of the files in an output directory (0 if missing)."""
+    if output.is_dir():
+        return sum(f.stat().st_size for f in output.rglob('*') if f.is_file())
+    return output.stat().st_size if output.exists() else 0
+
+
+def time_call(name: str, func: Callable[[], None], outputs: List[Path], repeat: int,
+              quiet: bool = True, **info) -> Dict[str, object]:
+    """
+    Times a benchmark function and returns a result record.
+    Args:
+        name (str): Unique benchmark name.
+        func (Callable[[], None]): Function to time, called without arguments.
+        outputs (List[Path]): Output files of the function. They are removed before every run,
+            because FFmpeg would otherwise ask for permission to overwrite them.
+        repeat (int): Number of timed runs.
+        quiet (bool): If True, hide the output of the function and FFmpeg.
+        **info: Extra fields to store in the result record (e.g. scenario, function name).
+    Returns:
+        Dict[str, object]: Result record with status, timings and output size.
+    """
+    result: Dict[str, object] = {'name': name, **info, 'repeat': repeat}
+    times = []
+    print(f"Benchmarking {name}...")
+    try:
+        for _ in range(repeat):
+            for output in outputs:
+                if output.is_dir():
+                    shutil.rmtree(output)
+                elif output.exists():
+                    output.unlink()
+            with silence_output(quiet):
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+            # Some functions log errors instead of raising them, so check that they created their outputs
+            empty = [str(output) for output in outputs if get_output_bytes(output) == 0]
+            if empty:
+                raise RuntimeError(f"Output(s) missing or empty: {', '.join(empty)}")
+    except Exception as e:
+        print(f"  Failed: {e}")
+        result.update({'status': 'failed', 'error': str(e)})
+        return result
+
+    output_bytes = sum(get_output_bytes(output) for output in outputs)
+    result.update({
+        'status': 'ok',
+        'times': times,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'output_bytes': output_bytes,
+    })
+    print(f"  median {result['median']:.3f}s, min {result['min']:.3f}s, output {output_bytes} bytes")
+    return result
+
+
+def skipped(name: str, reason: str, **info) -> Dict[str, object]:
+    """Returns a result record for a benchmark that could not run."""
+    print(f"Skipping {name}: {reason}")
+    return {'name': name, **info, 'status': 'skipped', 'error': reason}
+
+
+#== Benchmarks ===============================
+
+def benchmark_tools(scenario: str, source: Path, work_dir: Path, repeat: int, quiet: bool) -> List[Dict[str, object]]:
+    """Times every function in tools.py on the synthetic source video of one scenario."""
+    duration = int(SCENARIOS[scenario]['duration'])
+    clip = work_dir / 'clip.mp4'
+    enhanced = work_dir / 'enhanced.mp4'
+    audio = work_dir / 'audio.mp3'
+    amplified = work_dir / 'amplified.mp3'
+    webm = work_dir / 'video.webm'
+    srt = work_dir / 'subtitles.srt'
+    subtitled = work_dir / 'subtitled.webm'
+    adaptive_webm = work_dir / 'adaptive.webm'
+    dash_dir = work_dir / 'dash'
+    generate_synthetic_srt(srt, duration)
+
+    # Ordered so that every function finds the outputs of the previous ones
+    cases = [
+        ('extract_clip', lambda: extract_clip(input_video=source, start_time='0', duration=str(duration // 2), output_clip=clip), [clip]),
+        ('enhance_audio_in_video', lambda: enhance_audio_in_video(input_video=source, output_video=enhanced, pitch_semitones=-1.2, db_increase=0), [enhanced]),
+        ('extract_audio', lambda: extract_audio(input_video=source, output_audio=audio), [audio]),
+        ('amplify_audio', lambda: amplify_audio(input_audio=audio, output_audio=amplified, factor=1.5), [amplified]),
+        ('compress_and_convert_to_webm', lambda: compress_and_convert_to_webm(input_clip=source, output_webm=webm), [webm]),
+        ('compress_and_convert_to_webm_adaptive', lambda: compress_and_convert_to_webm_adaptive(input_clip=source, output_webm=adaptive_webm), [adaptive_webm]),
+        ('add_subtitles_to_webm', lambda: add_subtitles_to_webm(input_video=webm, subtitle_file=srt, output_video=subtitled), [subtitled]),
+        ('compress_and_convert_to_dash', lambda: compress_and_convert_to_dash(input_clip=source, output_manifest=dash_dir / 'video.mpd', subtitle_files={'synthetic': srt}), [dash_dir]),
+    ]
+    return [time_call(f"{function}[{scenario}]", func, outputs, repeat, quiet, function=function, scenario=scenario)
+            for function, func, outputs in cases]
+
+
+def benchmark_transcription(scenario: str, audio: Path, work_dir: Path, model_type: str,
+                            repeat: int, quiet: bool) -> Dict[str, object]:
+    """Times transcribe_audio (including model loading) on the extracted audio of one scenario."""
+    name = f"transcribe_audio[{scenario}]"
+    info = {'function': 'transcribe_audio', 'scenario': scenario, 'model': model_type}
+    try:
+        from transcribe_audio import transcribe_audio
+    except ImportError as e:
+        return skipped(name, f"Whisper not available ({e})", **info)
+    if not audio.exists():
+        return skipped(name, f"Audio file {audio} was not created", **info)
+
+    transcripts_dir = work_dir / 'transcripts'
+    return time_call(name, lambda: transcribe_audio(input_audio_path=audio, output_folder=transcripts_dir,
+                                                    model_type=model_type, verbose=False),
+                     [transcripts_dir], repeat, quiet, **info)
+
+
+def benchmark_correction(work_dir: Path, repeat: int, quiet: bool, latency: float) -> Dict[str, object]:
+    """Times correct_transcript_file on a synthetic transcript against a local fake OpenAI server."""
+    name = f"correct_transcript_file[{TRANSCRIPT_WORDS}words]"
+    info = {'function': 'correct_transcript_file', 'scenario': f"{TRANSCRIPT_WORDS}words", 'latency': latency}
+    raw_txt = work_dir / 'raw_transcript.txt'
+    corrected_txt = work_dir / 'corrected_transcript.txt'
+    raw_txt.write_text(generate_synthetic_transcript(TRANSCRIPT_WORDS), encoding='utf-8')
+
+    with fake_openai_server(latency):
+        try:
+            from ai_correct_audiotranscripts import correct_transcript_file
+        except ImportError as e:
+            return skipped(name, f"OpenAI/tiktoken not available ({e})", **info)
+        return time_call(name, lambda: correct_transcript_file(input_file=raw_txt, output_file=corrected_txt,
+                                                               model='gpt-4o', delay_between_chunks=0),
+                         [corrected_txt], repeat, quiet, **info)
+
+
+def get_ffmpeg_version() -> str:
+    """Returns the first line of `ffmpeg -version`."""
+    output = subprocess.run(['ffmpeg', '-version'], check=True, capture_output=True, text=True).stdout
+    return output.splitlines()[0] if output else 'unknown'
+
+
+def get_package_version(package: str) -> Optional[str]:
+    """Returns the installed version of a Python package, or None if it is not installed."""
+    from importlib import metadata
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def run_benchmarks(args: argparse.Namespace) -> None:
+    """Generates the synthetic inputs, runs all benchmarks and writes the JSON results."""
+    if shutil.which('ffmpeg') is None:
+        raise FileNotFoundError("FFmpeg not found. It must be installed and added to the PATH variable.")
+
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s) {unknown}, choose from {list(SCENARIOS)}.")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='videotools-bench-') as tmp:
+        work_root = Path(args.work_dir) if args.work_dir else Path(tmp)
+
+        for scenario in args.scenarios:
+            settings = SCENARIOS[scenario]
+            work_dir = create_dir(work_root / scenario)
+            source = work_dir / 'source.mp4'
+            print(f"== Scenario {scenario}: {settings['duration']}s, {settings['size']}, {settings['audio']} audio ==")
+            generate_synthetic_video(source, int(settings['duration']), str(settings['size']), str(settings['audio']))
+
+            results.extend(benchmark_tools(scenario, source, work_dir, args.repeat, not args.verbose))
+            if not args.skip_transcription:
+                results.append(benchmark_transcription(scenario, work_dir / 'audio.mp3', work_dir,
+                                                       args.whisper_model, args.repeat, not args.verbose))
+
+        if not args.skip_correction:
+            results.append(benchmark_correction(create_dir(work_root / 'correction'), args.repeat,
+                                                not args.verbose, args.fake_latency))
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'ffmpeg': get_ffmpeg_version(),
+            'whisper': get_package_version('openai-whisper'),
+            'openai': get_package_version('openai'),
+            'scenarios': {name: SCENARIOS[name] for name in args.scenarios},
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    output = Path(args.output)
+    output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f"Benchmark results saved to {output}")
+
+
+#== Compare mode =============================
+
+def compare_results(baseline: Dict[str, object], current: Dict[str, object], threshold: float) -> List[str]:
+    """
+    Compares two benchmark reports and prints a table of the differences.
+    Args:
+        baseline (Dict[str, object]): The report of the reference run.
+        current (Dict[str, object]): The report of the new run.
+        threshold (float): Relative increase (e.g. 0.10 for 10%) of the median time or the output size
+            that counts as a regression.
+    Returns:
+        List[str]: Names of the benchmarks that regressed.
+    """
+    baseline_results = {r['name']: r for r in baseline['results']}
+    current_results = {r['name']: r for r in current['results']}
+    regressions = []
+
+    for key in ('ffmpeg', 'whisper', 'openai'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"Note: {key} changed from {baseline['meta'].get(key)} to {current['meta'].get(key)}")
+
+    print(f"{'Benchmark':<50} {'Baseline':>10} {'Current':>10} {'Time':>8} {'Size':>8}  Status")
+    for name in sorted(baseline_results.keys() | current_results.keys()):
+        old, new = baseline_results.get(name), current_results.get(name)
+        if old is None or new is None:
+            print(f"{name:<50} {'':>10} {'':>10} {'':>8} {'':>8}  {'new' if old is None else 'missing'}")
+            continue
+        if old['status'] != 'ok' or new['status'] != 'ok':
+            status = 'FAILED' if old['status'] == 'ok' else f"{old['status']}/{new['status']}"
+            if status == 'FAILED':
+                regressions.append(name)
+            print(f"{name:<50} {'':>10} {'':>10} {'':>8} {'':>8}  {status}")
+            continue
+
+        time_change = new['median'] / old['median'] - 1 if old['median'] else 0.0
+        size_change = new['output_bytes'] / old['output_bytes'] - 1 if old['output_bytes'] else 0.0
+        flags = []
+        if time_change > threshold:
+            flags.append('SLOWER')
+        if size_change > threshold:
+            flags.append('LARGER')
+        if flags:
+            regressions.append(name)
+        print(f"{name:<50} {old['median']:>9.3f}s {new['median']:>9.3f}s {time_change:>+8.1%} {size_change:>+8.1%}  "
+              f"{' '.join(flags) or 'ok'}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the video and audio tools on synthetic media.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks and write the results as JSON.')
+    run_parser.add_argument('--output', default='bench_output.json', help='JSON results file.')
+    run_parser.add_argument('--scenarios', nargs='+', default=DEFAULT_SCENARIOS,
+                            help=f"Synthetic input scenarios, choose from {list(SCENARIOS)}.")
+    run_parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per benchmark.')
+    run_parser.add_argument('--whisper-model', default='tiny', help="Whisper model for the transcription benchmark.")
+    run_parser.add_argument('--skip-transcription', action='store_true', help='Do not benchmark Whisper.')
+    run_parser.add_argument('--skip-correction', action='store_true', help='Do not benchmark the ChatGPT correction.')
+    run_parser.add_argument('--fake-latency', type=float, default=0.0,
+                            help='Seconds the fake OpenAI server waits before answering a request.')
+    run_parser.add_argument('--work-dir', help='Keep the synthetic media and outputs in this directory.')
+    run_parser.add_argument('--verbose', action='store_true', help='Show the output of FFmpeg and Whisper.')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two benchmark result files.')
+    compare_parser.add_argument('baseline', help='JSON results of the reference run.')
+    compare_parser.add_argument('current', help='JSON results of the new run.')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='Relative increase that counts as a regression (default 0.10 = 10%%).')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run_benchmarks(args)
+    else:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        current = json.loads(Path(args.current).read_text(encoding='utf-8'))
+        regressions = compare_results(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) found: {', '.join(regressions)}")
+            sys.exit(1)
+        print('No regressions found.')
+
+
+if __name__ == "__main__":
+    main()
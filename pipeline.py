@@ -0,0 +1,280 @@
+"""
+Pipeline DAG Executor
+
+=====================
+Description:
+This module runs the processing steps of this repo (clipping, WebM encoding, audio extraction,
+transcription, correction, subtitling, ...) as a declarative pipeline. Each step is described as a
+`Stage` with its function, parameters, input files and output files. The executor derives the
+dependency graph from these files: a stage depends on every stage that produces one of its inputs.
+
+Independent stages, such as the WebM encode and the audio -> transcribe -> correct chain, run
+concurrently, as long as a `ResourceManager` (see `resources.py`) finds enough free CPU cores and
+memory for them. Stage functions with a `threads` argument get the number of cores their job was
+given, so concurrent stages do not oversubscribe the CPU. If a stage fails,
+all stages that (indirectly) depend on it are skipped, while independent stages finish normally.
+
+Features:
+- Declarative stage definitions in plain Python (see `runtools.py`).
+- Automatic dependency resolution, with checks for missing inputs, duplicate outputs and cycles.
+- Concurrent execution of independent stages within a CPU and memory budget.
+- Make-like skipping of stages whose outputs are newer than their inputs and whose parameters did not change.
+- A stage counts as failed if it raises an exception or does not create all of its outputs.
+
+Example:
+    stages = [
+        Stage('webm', compress_and_convert_to_webm,
+              params={'input_clip': input_file, 'output_webm': webm_video_file},
+              inputs=[input_file], outputs=[webm_video_file], cpus=4),
+        Stage('audio', extract_audio,
+              params={'input_video': input_file, 'output_audio': audio_file},
+              inputs=[input_file], outputs=[audio_file]),
+    ]
+    run_pipeline(stages, max_cpus=8)
+
+Latest update: 19 October 2026
+Author: Olaf Janssen (ookgezellig) - Supported by ChatGPT
+License: Creative Commons CC0 - http://creativecommons.org/publicdomain/zero/1.0
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from resources import Job, ResourceManager, job_context
+
+logger = logging.getLogger(__name__)
+
+# Stage statuses
+PENDING = 'pending'
+DONE = 'done'
+UP_TO_DATE = 'up-to-date'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+@dataclass
+class Stage:
+    """
+    A single pipeline step.
+    Attributes:
+        name (str): Unique name of the stage.
+        func (Callable[..., Any]): The function to run, e.g. `compress_and_convert_to_webm`.
+        params (Dict[str, Any]): Keyword arguments for `func`.
+        inputs (List[Path]): Files the stage reads. Either produced by another stage or already on disk.
+        outputs (List[Path]): Files the stage creates. Used to derive dependencies and to check success.
+        cpus (int): Number of CPU cores the stage is expected to keep busy. Default is 1.
+    """
+    name: str
+    func: Callable[..., Any]
+    params: Dict[str, Any] = field(default_factory=dict)
+    inputs: List[Path] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    cpus: int = 1
+
+    def __post_init__(self) -> None:
+        self.inputs = [Path(p) for p in self.inputs]
+        self.outputs = [Path(p) for p in self.outputs]
+
+
+def build_dependencies(stages: List[Stage]) -> Dict[str, Set[str]]:
+    """
+    Derives the dependency graph of a pipeline from the stage inputs and outputs.
+    Args:
+        stages (List[Stage]): The pipeline stages.
+    Returns:
+        Dict[str, Set[str]]: For each stage name, the names of the stages it depends on.
+    Raises:
+        ValueError: If stage names or outputs are not unique, or if the stages form a cycle.
+        FileNotFoundError: If an input is neither produced by a stage nor present on disk.
+    """
+    producers: Dict[Path, str] = {}
+    names: Set[str] = set()
+    for stage in stages:
+        if stage.name in names:
+            raise ValueError(f"Duplicate stage name '{stage.name}'.")
+        names.add(stage.name)
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"Output {output} is produced by both '{producers[output]}' and '{stage.name}'.")
+            producers[output] = stage.name
+
+    dependencies: Dict[str, Set[str]] = {}
+    for stage in stages:
+        dependencies[stage.name] = set()
+        for input_file in stage.inputs:
+            if input_file in producers:
+                dependencies[stage.name].add(producers[input_file])
+            elif not input_file.exists():
+                raise FileNotFoundError(f"Input file {input_file} of stage '{stage.name}' does not exist "
+                                        f"and is not produced by any stage.")
+
+    # Check for cycles by repeatedly removing stages without unresolved dependencies
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"The pipeline contains a dependency cycle between stages {sorted(remaining)}.")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return dependencies
+
+
+def params_hash(stage: Stage) -> str:
+    """Returns a hash of the stage function and its parameters, to detect changed settings (e.g. another Whisper model)."""
+    description = json.dumps({'func': stage.func.__name__, 'params': stage.params}, sort_keys=True, default=str)
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+def params_file(stage: Stage) -> Path:
+    """Returns the hidden file next to the first output of the stage that stores the hash of its parameters."""
+    first_output = stage.outputs[0]
+    return first_output.with_name(f".{first_output.name}.params")
+
+
+def is_up_to_date(stage: Stage) -> bool:
+    """Returns True if all outputs of the stage exist, are newer than all of its inputs and were made with the same parameters."""
+    if not stage.outputs or not all(output.exists() for output in stage.outputs):
+        return False
+    stamp = params_file(stage)
+    if not stamp.exists() or stamp.read_text(encoding='utf-8').strip() != params_hash(stage):
+        return False
+    newest_input = max((p.stat().st_mtime for p in stage.inputs if p.exists()), default=0.0)
+    return min(output.stat().st_mtime for output in stage.outputs) >= newest_input
+
+
+def resource_key(stage: Stage) -> str:
+    """Returns the stage type used for resource profiles: the function name, plus the Whisper model if any."""
+    model_type = stage.params.get('model_type')
+    return f"{stage.func.__name__}:{model_type}" if model_type else stage.func.__name__
+
+
+def run_stage(stage: Stage, threads: Optional[int] = None, job: Optional[Job] = None) -> None:
+    """
+    Runs a single stage and checks that it created all of its outputs.
+    Args:
+        stage (Stage): The stage to run.
+        threads (Optional[int]): Number of CPU cores the stage was given. Passed to the stage function
+            as its `threads` argument, if it has one and the stage parameters do not set it already.
+        job (Optional[Job]): The job of the stage, in which the memory of its FFmpeg processes is recorded.
+    Raises:
+        RuntimeError: If the stage returned without creating all of its outputs. Several functions in this
+            repo log errors instead of raising them, so this is how their failures are detected.
+    Previous outputs are moved aside while the stage runs (FFmpeg would otherwise ask for permission to
+    overwrite them), and are put back if the stage fails, so a failed rerun keeps the last good results.
+    """
+    backups = {}
+    for output in stage.outputs:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        if output.is_file():
+            backups[output] = output.with_name(f"{output.name}.previous")
+            output.replace(backups[output])
+
+    try:
+        params = dict(stage.params)
+        if threads and 'threads' in inspect.signature(stage.func).parameters:
+            params.setdefault('threads', threads)
+        with job_context(job):
+            stage.func(**params)
+        missing = [str(output) for output in stage.outputs if not output.exists()]
+        if missing:
+            raise RuntimeError(f"Stage '{stage.name}' did not create its output(s): {', '.join(missing)}")
+    except BaseException:
+        # Restore the previous outputs, replacing any partial new ones
+        for output, backup in backups.items():
+            backup.replace(output)
+        raise
+
+    for backup in backups.values():
+        backup.unlink()
+    if stage.outputs:
+        params_file(stage).write_text(params_hash(stage), encoding='utf-8')
+
+
+def run_pipeline(stages: List[Stage], max_cpus: Optional[int] = None, force: bool = False,
+                 resources: Optional[ResourceManager] = None) -> Dict[str, str]:
+    """
+    Runs a pipeline, executing independent stages concurrently.
+    Args:
+        stages (List[Stage]): The pipeline stages, in any order.
+        max_cpus (Optional[int]): Maximum number of CPU cores the running stages may use together.
+            Default is the number of cores of this machine. A stage asking for more cores than this
+            limit gets all cores. Ignored if `resources` is given.
+        force (bool): If True, run all stages, even if their outputs are up to date. Default is False.
+        resources (Optional[ResourceManager]): Decides whether a stage fits in the free CPU cores and memory.
+            Default is a ResourceManager with `max_cpus` cores and no profile file.
+    Returns:
+        Dict[str, str]: The final status of every stage ('done', 'up-to-date', 'failed' or 'skipped').
+    Raises:
+        RuntimeError: If one or more stages failed. All independent stages are finished first.
+    """
+    resources = resources or ResourceManager(max_cpus=max_cpus)
+    dependencies = build_dependencies(stages)
+    dependents: Dict[str, Set[str]] = {stage.name: set() for stage in stages}
+    for name, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].add(name)
+
+    status = {stage.name: PENDING for stage in stages}
+    running: Dict[Future, Tuple[str, Job]] = {}
+
+    def skip_dependents(name: str) -> None:
+        for dependent in dependents[name]:
+            if status[dependent] == PENDING:
+                status[dependent] = SKIPPED
+                logger.warning(f"Skipping stage '{dependent}' because '{name}' did not complete.")
+                skip_dependents(dependent)
+
+    with ThreadPoolExecutor(max_workers=len(stages) or 1) as executor:
+        while True:
+            # Start every stage whose dependencies are done, in definition order, while resources are available
+            running_names = {name for name, _ in running.values()}
+            for stage in stages:
+                if status[stage.name] != PENDING or stage.name in running_names:
+                    continue
+                if not all(status[dep] in (DONE, UP_TO_DATE) for dep in dependencies[stage.name]):
+                    continue
+                # Outputs of a stage that depends on a rerun stage are outdated, whatever their timestamps
+                rerun_upstream = any(status[dep] == DONE for dep in dependencies[stage.name])
+                if not force and not rerun_upstream and is_up_to_date(stage):
+                    status[stage.name] = UP_TO_DATE
+                    logger.info(f"Stage '{stage.name}' is up to date, skipping.")
+                    continue
+                job = resources.try_acquire(resource_key(stage), stage.cpus)
+                if job is None:
+                    continue
+                running_names.add(stage.name)
+                logger.info(f"Starting stage '{stage.name}' ({job.cpus} of {resources.max_cpus} CPUs, "
+                            f"~{job.memory_mb:.0f} MB).")
+                running[executor.submit(run_stage, stage, job.cpus, job)] = (stage.name, job)
+
+            if not running:
+                if any(s == PENDING for s in status.values()):
+                    continue  # Stages were marked up to date, so new stages may have become ready
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, job = running.pop(future)
+                resources.release(job)
+                try:
+                    future.result()
+                    status[name] = DONE
+                    logger.info(f"Stage '{name}' completed.")
+                except Exception as e:
+                    status[name] = FAILED
+                    logger.error(f"Stage '{name}' failed: {e}")
+                    skip_dependents(name)
+
+    failed = [name for name, s in status.items() if s == FAILED]
+    if failed:
+        raise RuntimeError(f"Pipeline failed in stage(s): {', '.join(failed)}. Status: {status}")
+    return status
@@ -0,0 +1,325 @@
+"""
+Resource Manager for Pipeline Stages
+
+=====================
+Description:
+This module keeps heavy pipeline stages (Whisper transcription, VP9 encodes) from pushing the machine
+into swap or oversubscribing its CPU cores. The `ResourceManager` admits a new job only when enough
+cores and memory are free, and records the observed peak memory (RSS) of every job per stage type and
+Whisper model size, so later runs use measured instead of default requirements.
+
+The pipeline executor (see `pipeline.py`) passes the number of cores a job was given to the stage function
+as its `threads` argument, which pins the FFmpeg thread count and the torch intra-op threads of Whisper.
+
+Features:
+- Admission control on free CPU cores and memory (with a safety reserve for the rest of the system).
+- Default memory requirements per stage type and Whisper model, replaced by measured values once available.
+- Measured peak RSS per stage type, saved in a JSON profile file.
+- A job that does not fit is still started when nothing else is running, so a pipeline can always finish.
+
+Notes:
+- Stages run in threads of one process. FFmpeg stages start their commands with `run_tracked`, which
+  measures the peak RSS of each FFmpeg child process itself, so these profiles are recorded even when
+  other stages run at the same time.
+- Stages that work inside this process (Whisper) can only be measured by the growth of this process's RSS.
+  Their profiles are only recorded if no other in-process stage ran at the same time, because the growth
+  would then belong to both.
+
+Requirements:
+- The `psutil` package for measuring in-process stages and the live memory of running jobs (optional).
+  Without it, FFmpeg stages are still measured when they finish, other stages use the default requirements,
+  and available memory is read from /proc/meminfo (Linux only).
+- `os.wait4` (Linux and macOS) for measuring FFmpeg child processes. Elsewhere, FFmpeg stages are not measured.
+
+Latest update: 19 October 2026
+Author: Olaf Janssen (ookgezellig) - Supported by ChatGPT
+License: Creative Commons CC0 - http://creativecommons.org/publicdomain/zero/1.0
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Union
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, see module docstring
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# Memory needed (MB) by stage type, before measurements are available. Whisper keys include the model size.
+DEFAULT_MEMORY_MB: Dict[str, int] = {
+    'transcribe_audio:large-v3': 10000,
+    'transcribe_audio:large-v2': 10000,
+    'transcribe_audio:large': 10000,
+    'transcribe_audio:turbo': 6000,
+    'transcribe_audio:medium': 5000,
+    'transcribe_audio:small': 2000,
+    'transcribe_audio:base': 1000,
+    'transcribe_audio:tiny': 1000,
+    'compress_and_convert_to_webm': 1000,
+    'compress_and_convert_to_webm_adaptive': 1000,
+    'compress_and_convert_to_dash': 2000,
+}
+FALLBACK_MEMORY_MB: int = 500  # Memory needed by stage types without a default or measurement
+MEMORY_MARGIN: float = 1.2  # Measured peaks are multiplied by this margin before admission
+SAMPLE_INTERVAL: float = 0.5  # Seconds between memory samples of running jobs
+
+# The job of the current pipeline thread, set by job_context and used by run_tracked
+_current = threading.local()
+
+
+@dataclass(eq=False)
+class Job:
+    """A running job that was admitted by the ResourceManager."""
+    key: str
+    cpus: int
+    memory_mb: float
+    started: float
+    start_rss_mb: float = 0.0  # RSS of this process when the job started
+    current_rss_mb: float = 0.0  # Memory the job holds now, as far as it is known
+    peak_rss_mb: float = 0.0  # Highest RSS of this process while the job ran (in-process jobs)
+    child_processes: int = 0  # Child processes measured by run_tracked
+    child_peak_rss_mb: float = 0.0  # Highest peak RSS of those child processes
+    untracked_processes: int = 0  # Child processes that could not be measured
+    active_pids: Set[int] = field(default_factory=set)  # Child processes that are running now
+    overlapping: List['Job'] = field(default_factory=list)  # Jobs that ran at the same time
+
+    @property
+    def in_process(self) -> bool:
+        """True if the job has not started any child processes, so its work happens in this process."""
+        return not self.child_processes and not self.untracked_processes and not self.active_pids
+
+
+@contextmanager
+def job_context(job: Optional[Job]) -> Iterator[None]:
+    """Makes `job` the job of the current thread, so that `run_tracked` measures its child processes."""
+    previous = getattr(_current, 'job', None)
+    _current.job = job
+    try:
+        yield
+    finally:
+        _current.job = previous
+
+
+def run_tracked(command: Sequence[str], check: bool = False, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Runs a command like `subprocess.run`, and records the peak memory of the child process in the job of the
+    current thread (see `job_context`). Only for commands whose output is not captured, such as FFmpeg encodes.
+    Args:
+        command (Sequence[str]): The command to run.
+        check (bool): If True, raise CalledProcessError if the command fails. Default is False.
+        **kwargs: Other arguments for `subprocess.Popen`.
+    Returns:
+        subprocess.CompletedProcess: The command and its return code.
+    Raises:
+        subprocess.CalledProcessError: If `check` is True and the command fails.
+    """
+    job = getattr(_current, 'job', None)
+    if job is None or not hasattr(os, 'wait4'):
+        if job is not None:
+            job.untracked_processes += 1
+        return subprocess.run(command, check=check, **kwargs)
+
+    process = subprocess.Popen(command, **kwargs)
+    job.active_pids.add(process.pid)
+    try:
+        # Reap the child ourselves, because only wait4 returns its resource usage
+        _, status, usage = os.wait4(process.pid, 0)
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        job.active_pids.discard(process.pid)
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+    peak_rss_mb = usage.ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10)
+    job.child_processes += 1
+    job.child_peak_rss_mb = max(job.child_peak_rss_mb, peak_rss_mb)
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    return subprocess.CompletedProcess(command, process.returncode)
+
+
+def get_available_memory_mb() -> Optional[float]:
+    """Returns the memory (MB) available for new processes, or None if it cannot be determined."""
+    if psutil is not None:
+        return psutil.virtual_memory().available / 2**20
+    # MemAvailable includes reclaimable page cache, which is large after reading big video files (MemFree is not)
+    try:
+        with open('/proc/meminfo', encoding='utf-8') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 2**10  # Value in kB
+    except OSError:
+        pass
+    return None
+
+
+def get_process_rss_mb() -> float:
+    """Returns the RSS (MB) of this process, without its child processes."""
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def get_children_rss_mb(pids: Sequence[int]) -> float:
+    """Returns the total RSS (MB) of the given child processes that are still running."""
+    rss = 0.0
+    for pid in pids:
+        try:
+            rss += psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            continue  # The child process ended in the meantime
+    return rss / 2**20
+
+
+class ResourceManager:
+    """
+    Admits jobs when enough CPU cores and memory are free, and records the resources they used.
+    Args:
+        max_cpus (Optional[int]): Maximum number of CPU cores all jobs may use together.
+            Default is the number of cores of this machine.
+        memory_limit_mb (Optional[float]): Maximum memory (MB) all jobs may use together. Default is None,
+            which limits jobs only by the memory that is currently available.
+        reserve_mb (float): Memory (MB) kept free for the operating system and other programs. Default is 1024.
+        profile_file (Optional[Union[str, Path]]): JSON file in which measured requirements are loaded and saved.
+            Default is None, which keeps measurements in memory only.
+    """
+
+    def __init__(self, max_cpus: Optional[int] = None, memory_limit_mb: Optional[float] = None,
+                 reserve_mb: float = 1024, profile_file: Optional[Union[str, Path]] = None) -> None:
+        self.max_cpus = max_cpus or os.cpu_count() or 1
+        self.memory_limit_mb = memory_limit_mb
+        self.reserve_mb = reserve_mb
+        self.profile_file = Path(profile_file) if profile_file else None
+        self.profiles: Dict[str, Dict[str, float]] = {}
+        if self.profile_file and self.profile_file.exists():
+            self.profiles = json.loads(self.profile_file.read_text(encoding='utf-8'))
+
+        self.jobs: List[Job] = []
+        self._lock = threading.Lock()
+        self._monitor: Optional[threading.Thread] = None
+        if psutil is None:
+            logger.warning("psutil is not installed, so only FFmpeg stages are measured, when they finish.")
+
+    def memory_needed_mb(self, key: str) -> float:
+        """Returns the memory (MB) a job of this stage type needs: measured if available, otherwise the default."""
+        if key in self.profiles:
+            return self.profiles[key]['peak_rss_mb'] * MEMORY_MARGIN
+        return DEFAULT_MEMORY_MB.get(key, DEFAULT_MEMORY_MB.get(key.split(':')[0], FALLBACK_MEMORY_MB))
+
+    def try_acquire(self, key: str, cpus: int) -> Optional[Job]:
+        """
+        Admits a job if enough CPU cores and memory are free.
+        Args:
+            key (str): Stage type, e.g. 'compress_and_convert_to_webm' or 'transcribe_audio:large-v2'.
+            cpus (int): Number of CPU cores requested. Requests above max_cpus are reduced to max_cpus.
+        Returns:
+            Optional[Job]: The admitted job, or None if it does not fit yet. When no other job is running,
+                the job is always admitted, so that it can run on its own.
+        """
+        cpus = max(1, min(cpus, self.max_cpus))
+        memory_mb = self.memory_needed_mb(key)
+
+        with self._lock:
+            if self.jobs:
+                if sum(job.cpus for job in self.jobs) + cpus > self.max_cpus:
+                    return None
+                reserved_mb = sum(job.memory_mb for job in self.jobs)
+                if self.memory_limit_mb is not None and reserved_mb + memory_mb > self.memory_limit_mb:
+                    return None
+                available_mb = get_available_memory_mb()
+                if available_mb is not None:
+                    # Running jobs that have not reached their peak yet will still take memory
+                    still_needed_mb = sum(max(0.0, job.memory_mb - job.current_rss_mb) for job in self.jobs)
+                    if available_mb - still_needed_mb - self.reserve_mb < memory_mb:
+                        return None
+            else:
+                available_mb = get_available_memory_mb()
+                if available_mb is not None and available_mb - self.reserve_mb < memory_mb:
+                    logger.warning(f"Starting '{key}' although it may need {memory_mb:.0f} MB, "
+                                   f"while only {available_mb:.0f} MB is available.")
+
+            job = Job(key=key, cpus=cpus, memory_mb=memory_mb, started=time.monotonic())
+            job.overlapping = list(self.jobs)
+            for other in self.jobs:
+                other.overlapping.append(job)
+            if psutil is not None:
+                job.start_rss_mb = job.peak_rss_mb = get_process_rss_mb()
+            self.jobs.append(job)
+            self._start_monitor()
+        return job
+
+    def release(self, job: Job) -> None:
+        """Releases the resources of a finished job and records its measured peak memory."""
+        with self._lock:
+            self.jobs.remove(job)
+            peak_rss_mb = self.measured_peak_rss_mb(job)
+            if peak_rss_mb is None:
+                return
+
+            profile = self.profiles.get(job.key, {'runs': 0, 'peak_rss_mb': 0.0})
+            self.profiles[job.key] = {
+                'runs': profile['runs'] + 1,
+                'peak_rss_mb': max(profile['peak_rss_mb'], peak_rss_mb),  # Highest peak seen so far
+            }
+            logger.info(f"Job '{job.key}' used at most {peak_rss_mb:.0f} MB.")
+            if self.profile_file:
+                self.profile_file.parent.mkdir(parents=True, exist_ok=True)
+                self.profile_file.write_text(json.dumps(self.profiles, indent=2), encoding='utf-8')
+
+    @staticmethod
+    def measured_peak_rss_mb(job: Job) -> Optional[float]:
+        """
+        Returns the peak memory (MB) of a finished job, or None if it could not be measured reliably.
+        Jobs that ran FFmpeg are measured by the peak RSS of their child processes. In-process jobs are measured
+        by the growth of this process's RSS, but only if no other in-process job ran at the same time.
+        """
+        if job.untracked_processes:
+            logger.info(f"Job '{job.key}' ran processes that cannot be measured here, so its memory is not recorded.")
+            return None
+        if job.child_processes:
+            return job.child_peak_rss_mb
+        if psutil is None:
+            return None
+        if any(other.in_process for other in job.overlapping):
+            logger.info(f"Job '{job.key}' ran alongside another in-process job, so its memory is not recorded.")
+            return None
+        return max(job.peak_rss_mb - job.start_rss_mb, 0.0)
+
+    def _start_monitor(self) -> None:
+        """Starts the sampling thread if it is not running. Must be called with the lock held."""
+        if psutil is None or (self._monitor is not None and self._monitor.is_alive()):
+            return
+        self._monitor = threading.Thread(target=self._sample, daemon=True)
+        self._monitor.start()
+
+    def _sample(self) -> None:
+        """Samples the memory usage of running jobs: their child processes, or this process for in-process jobs."""
+        while True:
+            rss_mb = get_process_rss_mb()
+            with self._lock:
+                if not self.jobs:
+                    self._monitor = None
+                    return
+                jobs = list(self.jobs)
+                in_process_jobs = [job for job in jobs if job.in_process]
+            for job in jobs:
+                if job.active_pids:
+                    job.current_rss_mb = get_children_rss_mb(list(job.active_pids))
+                elif job in in_process_jobs:
+                    job.peak_rss_mb = max(job.peak_rss_mb, rss_mb)
+                    # The growth of this process only belongs to this job if it is the only in-process job
+                    job.current_rss_mb = rss_mb - job.start_rss_mb if len(in_process_jobs) == 1 else 0.0
+                else:
+                    job.current_rss_mb = 0.0  # Between two FFmpeg runs
+            time.sleep(SAMPLE_INTERVAL)
@@ -13,6 +13,7 @@ This module performs various operations on video and audio files, including:
 6. Transcribing audio using Whisper.
 7. Correcting raw audio transcripts using ChatGPT.
 8. Embedding subtitles (both raw and AI-corrected) into the WebM video files.
+9. Encoding multi-rendition WebM with a DASH manifest for adaptive streaming.
 
 Main Functions:
 - Extract video clips.
@@ -22,6 +23,10 @@ Main Functions:
 - Transcribe audio using Whisper.
 - Correct transcripts using AI (ChatGPT).
 - Add subtitles to videos.
+- Create adaptive streaming (DASH) WebM.
+
+The steps are defined as pipeline stages (see pipeline.py). Independent stages, such as the WebM
+encode and the audio transcription chain, run concurrently within the configured CPU limit.
 
 Requirements:
 - FFmpeg for video/audio processing. It must be installed on your machine and added to the PATH variable
@@ -36,7 +41,10 @@ License: Creative Commons CC0 - http://creativecommons.org/publicdomain/zero/1.0
 from tools import *
 from transcribe_audio import transcribe_audio
 from ai_correct_audiotranscripts import correct_transcript_file
+from pipeline import Stage, run_pipeline
+from resources import ResourceManager
 from pathlib import Path
+import os
 
 # Set up logging (optional)
 import logging
@@ -56,6 +64,7 @@ output_dir = create_dir(Path('output_files'))  # Main output directory
 video_dir = create_dir(output_dir / 'video')   # Video clips directory
 webm_dir = create_dir(video_dir / 'webm')      # WebM clips directory
 subtitled_video_dir = create_dir(webm_dir / 'subtitled')  # Subtitled video directory
+dash_dir = create_dir(webm_dir / 'dash')  # Adaptive streaming (DASH) directory
 
 # Audio directories
 audio_dir = create_dir(output_dir / 'audio')   # Audio files directory
@@ -73,6 +82,8 @@ video_clip_file = video_dir / f"{input_stem}-clipped{input_suffix}"  # Clipped f
 sound_enhanced_video_file = video_dir / f"{input_stem}-soundEnhanced{input_suffix}"  # Full sound-enhanced video
 webm_video_file = webm_dir / f"{input_file.stem}.webm"  # WebM video file
 subtitled_video_file = subtitled_video_dir / f"{input_file.stem}.webm"  # Subtitled WebM file
+webm_segments_report_file = webm_dir / f"{input_file.stem}-segments.json"  # Per-scene bitrate report of the adaptive WebM encode
+dash_manifest_file = dash_dir / f"{input_file.stem}.mpd"  # DASH manifest of the multi-rendition WebM
 
 # Audio file paths
 audio_file = audio_dir / f"{input_file.stem}.mp3"  # MP3 audio file
@@ -95,6 +106,7 @@ print(f"   * Clipped video file: {video_clip_file}")
 print(f"   * Sound enhanced video file: {sound_enhanced_video_file}")
 print(f"   * WebM encoded and compressed video file: {webm_video_file}")
 print(f"   * Subtitled video file: {subtitled_video_file}")
+print(f"   * DASH manifest of multi-rendition WebM: {dash_manifest_file}")
 print(f"  === Extracted audio files == ")
 print(f"   * Extracted audio file: {audio_file}")
 print(f"   * Amplified extracted audio file: {amplified_audio_file}")
@@ -107,41 +119,93 @@ print(f"   * AI/ChatGPT corrected transcript SRT file: {corrected_transcribed_sr
 
 #=================================
 def main():
-    try:
-        # 1. Extract short clip for testing purposes (first 60 seconds)
-        start_time = "00:00:00"  # Start from the beginning of the video
-        duration = "00:01:00"    # 1 minute clip
-        #extract_clip(input_video=input_file, start_time=start_time, duration=duration, output_clip=video_clip_file)  # Clipped part of source video
-
-        # 2. Enhance the audio in the video and save the new video
-        pitch_semitones = -1.2  # Lower the pitch by 1.2 semitones for a deeper voice
-        db_increase = 0  # Increase the audio by 0dB
-        #enhance_audio_in_video(input_video=input_file, output_video=sound_enhanced_video_file, pitch_semitones=pitch_semitones, db_increase=db_increase)
-
-        # 3. Compress and convert the clip to WebM format
-        #compress_and_convert_to_webm(input_clip=input_file, output_webm=webm_video_file)
-
-        # 4. Extract the audio from the video clip and save as MP3
-        #extract_audio(input_video=input_file, output_audio=audio_file)
-
-        # 5. Amplify the audio if necessary
-        amp_factor = 1.5  # Amplification factor
-        #amplify_audio(input_audio=audio_file, output_audio=amplified_audio_file, factor=amp_factor)
-
-        # 6. Transcribe the audio using Whisper and generate a .srt file
-        whisper_model = "large-v2"
-        #transcribe_audio(input_audio_path=audio_file, output_folder=transcribed_audio_dir, model_type=whisper_model)
-
-        # 7. Correct the raw audio transcript using ChatGPT with a delay between chunks
-        chatgpt_model = "gpt-4o"
-        delay_between_chunks = 10  # 10-second delay between processing chunks
-        #correct_transcript_file(input_file=raw_transcribed_txt_file, output_file=corrected_transcribed_txt_file, model=chatgpt_model, delay_between_chunks=delay_between_chunks)
-
-        # 8. Add (raw or AI-corrected) subtitles to the WebM video file
-        #add_subtitles_to_webm(input_video=webm_video_file, subtitle_file=corrected_transcribed_srt_file, output_video=subtitled_video_file)
+    # The pipeline stages. The executor derives the order from the input and output files of each stage,
+    # and runs independent stages (like the WebM encode and the audio/transcription chain) concurrently.
+    # (Un)comment the stages you want to execute; nothing runs until you do. Inputs of a commented-out stage must already exist on disk.
+    max_cpus = os.cpu_count() or 1  # Maximum number of CPU cores used by all running stages together
+    # Admits stages only when enough cores and memory are free, and remembers how much memory each stage type used
+    resources = ResourceManager(max_cpus=max_cpus, reserve_mb=2048, profile_file=output_dir / 'resource_profiles.json')
+
+    # 1. Extract short clip for testing purposes (first 60 seconds)
+    start_time = "00:00:00"  # Start from the beginning of the video
+    duration = "00:01:00"    # 1 minute clip
+    clip_stage = Stage('extract_clip', extract_clip,
+                       params=dict(input_video=input_file, start_time=start_time, duration=duration, output_clip=video_clip_file),
+                       inputs=[input_file], outputs=[video_clip_file])  # Clipped part of source video
+
+    # 2. Enhance the audio in the video and save the new video
+    pitch_semitones = -1.2  # Lower the pitch by 1.2 semitones for a deeper voice
+    db_increase = 0  # Increase the audio by 0dB
+    enhance_stage = Stage('enhance_audio_in_video', enhance_audio_in_video,
+                          params=dict(input_video=input_file, output_video=sound_enhanced_video_file, pitch_semitones=pitch_semitones, db_increase=db_increase),
+                          inputs=[input_file], outputs=[sound_enhanced_video_file])
+
+    # 3. Compress and convert the clip to WebM format
+    webm_stage = Stage('compress_and_convert_to_webm', compress_and_convert_to_webm,
+                       params=dict(input_clip=input_file, output_webm=webm_video_file),
+                       inputs=[input_file], outputs=[webm_video_file], cpus=max(1, max_cpus // 2))
+
+    # 3b. Alternatively, compress and convert to WebM with per-scene bitrates (fewer bits for static slides, more for demos)
+    adaptive_webm_stage = Stage('compress_and_convert_to_webm_adaptive', compress_and_convert_to_webm_adaptive,
+                                params=dict(input_clip=input_file, output_webm=webm_video_file, report_file=webm_segments_report_file),
+                                inputs=[input_file], outputs=[webm_video_file, webm_segments_report_file], cpus=max(1, max_cpus // 2))
+
+    # 4. Extract the audio from the video clip and save as MP3
+    audio_stage = Stage('extract_audio', extract_audio,
+                        params=dict(input_video=input_file, output_audio=audio_file),
+                        inputs=[input_file], outputs=[audio_file])
+
+    # 5. Amplify the audio if necessary
+    amp_factor = 1.5  # Amplification factor
+    amplify_stage = Stage('amplify_audio', amplify_audio,
+                          params=dict(input_audio=audio_file, output_audio=amplified_audio_file, factor=amp_factor),
+                          inputs=[audio_file], outputs=[amplified_audio_file])
+
+    # 6. Transcribe the audio using Whisper and generate a .srt file
+    whisper_model = "large-v2"
+    transcribe_stage = Stage('transcribe_audio', transcribe_audio,
+                             params=dict(input_audio_path=audio_file, output_folder=transcribed_audio_dir, model_type=whisper_model),
+                             inputs=[audio_file], outputs=[raw_transcribed_txt_file, raw_transcribed_srt_file], cpus=max(1, max_cpus // 2))
+
+    # 7. Correct the raw audio transcript and subtitles using ChatGPT with a delay between chunks
+    chatgpt_model = "gpt-4o"
+    delay_between_chunks = 10  # 10-second delay between processing chunks
+    correct_txt_stage = Stage('correct_transcript_txt', correct_transcript_file,
+                              params=dict(input_file=raw_transcribed_txt_file, output_file=corrected_transcribed_txt_file, model=chatgpt_model, delay_between_chunks=delay_between_chunks),
+                              inputs=[raw_transcribed_txt_file], outputs=[corrected_transcribed_txt_file])
+    correct_srt_stage = Stage('correct_transcript_srt', correct_transcript_file,
+                              params=dict(input_file=raw_transcribed_srt_file, output_file=corrected_transcribed_srt_file, model=chatgpt_model, delay_between_chunks=delay_between_chunks),
+                              inputs=[raw_transcribed_srt_file], outputs=[corrected_transcribed_srt_file])
+
+    # 8. Add (raw or AI-corrected) subtitles to the WebM video file
+    subtitles_stage = Stage('add_subtitles_to_webm', add_subtitles_to_webm,
+                            params=dict(input_video=webm_video_file, subtitle_file=corrected_transcribed_srt_file, output_video=subtitled_video_file),
+                            inputs=[webm_video_file, corrected_transcribed_srt_file], outputs=[subtitled_video_file])
+
+    # 9. Encode multi-rendition (360p/480p/720p) segmented WebM with a DASH manifest and subtitle tracks, for adaptive streaming
+    dash_stage = Stage('compress_and_convert_to_dash', compress_and_convert_to_dash,
+                       params=dict(input_clip=input_file, output_manifest=dash_manifest_file, subtitle_files={'corrected': corrected_transcribed_srt_file}),
+                       inputs=[input_file, corrected_transcribed_srt_file], outputs=[dash_manifest_file], cpus=max(1, max_cpus // 2))
+
+    stages = [
+        #clip_stage,
+        #enhance_stage,
+        #webm_stage,
+        #adaptive_webm_stage,  # Use instead of webm_stage
+        #audio_stage,
+        #amplify_stage,
+        #transcribe_stage,
+        #correct_txt_stage,
+        #correct_srt_stage,
+        #subtitles_stage,
+        #dash_stage,
+    ]
 
+    try:
+        status = run_pipeline(stages, resources=resources)
+        logger.info(f"Pipeline finished: {status}")
     except Exception as e:
         logger.error(f"An error occurred: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,258 @@
+"""
+Tests for the pipeline DAG executor (pipeline.py) and its resource manager (resources.py). The stages
+use small stub functions instead of FFmpeg or Whisper, so these tests run without any media tools installed.
+
+Usage:
+    python -m pytest test_pipeline.py
+"""
+
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+import resources
+from pipeline import DONE, FAILED, SKIPPED, UP_TO_DATE, Stage, build_dependencies, run_pipeline
+from resources import Job, ResourceManager, job_context, run_tracked
+
+
+def write_file(output: Path, delay: float = 0.0, fail: bool = False) -> None:
+    """Stub stage function: waits, then creates its output (or raises)."""
+    time.sleep(delay)
+    if fail:
+        raise ValueError('stage failed')
+    Path(output).write_text('output', encoding='utf-8')
+
+
+class StubResources:
+    """ResourceManager stub that only counts CPU cores and records what it admitted."""
+
+    def __init__(self, max_cpus: int) -> None:
+        self.max_cpus = max_cpus
+        self.jobs: List[Job] = []
+        self.max_cpus_in_use = 0
+        self.refused: List[str] = []
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, cpus: int) -> Optional[Job]:
+        cpus = max(1, min(cpus, self.max_cpus))
+        with self._lock:
+            in_use = sum(job.cpus for job in self.jobs)
+            if self.jobs and in_use + cpus > self.max_cpus:
+                self.refused.append(key)
+                return None
+            job = Job(key=key, cpus=cpus, memory_mb=0, started=time.monotonic())
+            self.jobs.append(job)
+            self.max_cpus_in_use = max(self.max_cpus_in_use, in_use + cpus)
+            return job
+
+    def release(self, job: Job) -> None:
+        with self._lock:
+            self.jobs.remove(job)
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    source = tmp_path / 'input.mp4'
+    source.write_text('video', encoding='utf-8')
+    return source
+
+
+def test_dependencies_follow_inputs_and_outputs(tmp_path, source):
+    audio, transcript = tmp_path / 'audio.mp3', tmp_path / 'audio.txt'
+    stages = [
+        Stage('transcribe', write_file, {'output': transcript}, inputs=[audio], outputs=[transcript]),
+        Stage('audio', write_file, {'output': audio}, inputs=[source], outputs=[audio]),
+    ]
+    assert build_dependencies(stages) == {'transcribe': {'audio'}, 'audio': set()}
+
+
+def test_cycle_is_rejected(tmp_path):
+    a, b = tmp_path / 'a', tmp_path / 'b'
+    stages = [
+        Stage('first', write_file, {'output': a}, inputs=[b], outputs=[a]),
+        Stage('second', write_file, {'output': b}, inputs=[a], outputs=[b]),
+    ]
+    with pytest.raises(ValueError, match='cycle'):
+        build_dependencies(stages)
+
+
+def test_duplicate_output_is_rejected(tmp_path, source):
+    output = tmp_path / 'video.webm'
+    stages = [
+        Stage('webm', write_file, {'output': output}, inputs=[source], outputs=[output]),
+        Stage('adaptive_webm', write_file, {'output': output}, inputs=[source], outputs=[output]),
+    ]
+    with pytest.raises(ValueError, match='produced by both'):
+        build_dependencies(stages)
+
+
+def test_missing_input_is_rejected(tmp_path):
+    output = tmp_path / 'video.webm'
+    stages = [Stage('webm', write_file, {'output': output}, inputs=[tmp_path / 'missing.mp4'], outputs=[output])]
+    with pytest.raises(FileNotFoundError):
+        build_dependencies(stages)
+
+
+def test_failure_skips_downstream_stages_only(tmp_path, source):
+    audio, transcript, corrected = tmp_path / 'audio.mp3', tmp_path / 'audio.txt', tmp_path / 'corrected.txt'
+    webm = tmp_path / 'video.webm'
+    stages = [
+        Stage('webm', write_file, {'output': webm}, inputs=[source], outputs=[webm]),
+        Stage('audio', write_file, {'output': audio}, inputs=[source], outputs=[audio]),
+        Stage('transcribe', write_file, {'output': transcript, 'fail': True}, inputs=[audio], outputs=[transcript]),
+        Stage('correct', write_file, {'output': corrected}, inputs=[transcript], outputs=[corrected]),
+    ]
+    with pytest.raises(RuntimeError, match='transcribe'):
+        run_pipeline(stages, resources=StubResources(max_cpus=4))
+    assert webm.exists() and audio.exists()
+    assert not corrected.exists()
+
+
+def test_stage_without_outputs_counts_as_failed(tmp_path, source):
+    # Like transcribe_audio, which logs errors instead of raising them
+    stages = [Stage('silent_failure', lambda: None, inputs=[source], outputs=[tmp_path / 'never.txt'])]
+    with pytest.raises(RuntimeError, match='silent_failure'):
+        run_pipeline(stages, resources=StubResources(max_cpus=1))
+
+
+def test_failed_rerun_keeps_previous_outputs(tmp_path, source):
+    transcript = tmp_path / 'audio.txt'
+    transcript.write_text('good transcript', encoding='utf-8')
+    # Like correct_transcript_file after a failed API call: logs an error and returns without output
+    stages = [Stage('correct', lambda: None, inputs=[source], outputs=[transcript])]
+    with pytest.raises(RuntimeError):
+        run_pipeline(stages, force=True, resources=StubResources(max_cpus=1))
+    assert transcript.read_text(encoding='utf-8') == 'good transcript'
+    assert list(tmp_path.glob('*.previous')) == []
+
+
+def test_status_of_failed_and_skipped_stages(tmp_path, source):
+    first, second = tmp_path / 'first.txt', tmp_path / 'second.txt'
+    stages = [
+        Stage('first', write_file, {'output': first, 'fail': True}, inputs=[source], outputs=[first]),
+        Stage('second', write_file, {'output': second}, inputs=[first], outputs=[second]),
+    ]
+    with pytest.raises(RuntimeError) as error:
+        run_pipeline(stages, resources=StubResources(max_cpus=1))
+    assert f"'first': '{FAILED}'" in str(error.value)
+    assert f"'second': '{SKIPPED}'" in str(error.value)
+
+
+def test_up_to_date_stages_are_skipped(tmp_path, source):
+    audio, transcript = tmp_path / 'audio.mp3', tmp_path / 'audio.txt'
+    stages = [
+        Stage('audio', write_file, {'output': audio}, inputs=[source], outputs=[audio]),
+        Stage('transcribe', write_file, {'output': transcript}, inputs=[audio], outputs=[transcript]),
+    ]
+    assert run_pipeline(stages, resources=StubResources(max_cpus=2)) == {'audio': DONE, 'transcribe': DONE}
+    assert run_pipeline(stages, resources=StubResources(max_cpus=2)) == {'audio': UP_TO_DATE, 'transcribe': UP_TO_DATE}
+    assert run_pipeline(stages, force=True, resources=StubResources(max_cpus=2)) == {'audio': DONE, 'transcribe': DONE}
+
+
+def test_stage_reruns_when_parameters_change(tmp_path, source):
+    output = tmp_path / 'audio.mp3'
+    stage = Stage('amplify', write_file, {'output': output}, inputs=[source], outputs=[output])
+    assert run_pipeline([stage], resources=StubResources(max_cpus=1)) == {'amplify': DONE}
+    assert run_pipeline([stage], resources=StubResources(max_cpus=1)) == {'amplify': UP_TO_DATE}
+    stage.params['delay'] = 0.01  # Like changing amp_factor or whisper_model in runtools.py
+    assert run_pipeline([stage], resources=StubResources(max_cpus=1)) == {'amplify': DONE}
+
+
+def test_independent_stages_run_within_cpu_limit(tmp_path, source):
+    outputs = [tmp_path / f"output{i}.txt" for i in range(4)]
+    stages = [Stage(f"stage{i}", write_file, {'output': output, 'delay': 0.2}, inputs=[source], outputs=[output], cpus=2)
+              for i, output in enumerate(outputs)]
+    resources = StubResources(max_cpus=4)
+    run_pipeline(stages, resources=resources)
+    assert resources.max_cpus_in_use == 4  # Two stages at a time, never three
+    assert all(output.exists() for output in outputs)
+
+
+def test_threads_are_passed_to_stage_functions(tmp_path, source):
+    output = tmp_path / 'video.webm'
+    given = {}
+
+    def encode(output: Path, threads: Optional[int] = None) -> None:
+        given['threads'] = threads
+        write_file(output)
+
+    stages = [Stage('webm', encode, {'output': output}, inputs=[source], outputs=[output], cpus=3)]
+    run_pipeline(stages, resources=StubResources(max_cpus=8))
+    assert given['threads'] == 3
+
+
+def test_empty_pipeline_runs_nothing():
+    assert run_pipeline([], resources=StubResources(max_cpus=1)) == {}
+
+
+def test_job_waits_for_memory_of_running_job(monkeypatch):
+    monkeypatch.setattr(resources, 'get_available_memory_mb', lambda: 11500.0)
+    manager = ResourceManager(max_cpus=8, reserve_mb=1000)
+    whisper = manager.try_acquire('transcribe_audio:large-v2', 4)
+    assert whisper is not None
+    # Whisper may still take 10000 MB, so 1000 MB for the encode (plus the reserve) does not fit
+    assert manager.try_acquire('compress_and_convert_to_webm', 2) is None
+    manager.release(whisper)
+    assert manager.try_acquire('compress_and_convert_to_webm', 2) is not None
+
+
+def test_job_waits_for_cpus(monkeypatch):
+    monkeypatch.setattr(resources, 'get_available_memory_mb', lambda: None)
+    manager = ResourceManager(max_cpus=4)
+    first = manager.try_acquire('compress_and_convert_to_webm', 3)
+    assert manager.try_acquire('extract_audio', 2) is None
+    assert manager.try_acquire('extract_audio', 1) is not None
+    manager.release(first)
+
+
+def test_ffmpeg_jobs_are_profiled_while_other_jobs_run(monkeypatch, tmp_path):
+    monkeypatch.setattr(resources, 'psutil', None)  # FFmpeg jobs are measured without psutil
+    monkeypatch.setattr(resources, 'get_available_memory_mb', lambda: None)
+    profile_file = tmp_path / 'profiles.json'
+    manager = ResourceManager(max_cpus=8, profile_file=profile_file)
+    whisper = manager.try_acquire('transcribe_audio:large-v2', 4)
+    encode = manager.try_acquire('compress_and_convert_to_webm', 4)
+    # A child process that takes about 100 MB, standing in for FFmpeg
+    with job_context(encode):
+        run_tracked([sys.executable, '-c', "data = bytearray(100 * 2**20); data[::4096] = b'x' * len(data[::4096])"],
+                    check=True)
+    manager.release(encode)
+    manager.release(whisper)
+    assert 100 <= manager.profiles['compress_and_convert_to_webm']['peak_rss_mb'] < 200
+    assert 'transcribe_audio:large-v2' not in manager.profiles  # In-process jobs need psutil
+    assert profile_file.exists()
+
+
+def test_run_tracked_raises_on_failure():
+    job = Job(key='extract_audio', cpus=1, memory_mb=0, started=time.monotonic())
+    with job_context(job), pytest.raises(subprocess.CalledProcessError):
+        run_tracked([sys.executable, '-c', 'raise SystemExit(3)'], check=True)
+    assert job.child_processes == 1 and not job.active_pids
+    # Outside a job, commands run as usual
+    assert run_tracked([sys.executable, '-c', 'pass']).returncode == 0
+
+
+def test_in_process_jobs_are_only_profiled_without_other_in_process_jobs(monkeypatch, tmp_path):
+    # Pretend psutil is installed, with a process that always uses 3000 MB
+    monkeypatch.setattr(resources, 'psutil', object())
+    monkeypatch.setattr(resources, 'get_process_rss_mb', lambda: 3000.0)
+    monkeypatch.setattr(resources, 'get_available_memory_mb', lambda: None)
+    manager = ResourceManager(max_cpus=8)
+
+    whisper = manager.try_acquire('transcribe_audio:large-v2', 4)
+    correct = manager.try_acquire('correct_transcript_file', 1)
+    manager.release(correct)
+    manager.release(whisper)
+    assert manager.profiles == {}
+
+    whisper = manager.try_acquire('transcribe_audio:large-v2', 4)
+    encode = manager.try_acquire('compress_and_convert_to_webm', 4)
+    encode.child_processes = 1  # Ran FFmpeg, so it did not take memory in this process
+    manager.release(encode)
+    manager.release(whisper)
+    assert 'transcribe_audio:large-v2' in manager.profiles
@@ -0,0 +1,176 @@
+"""
+Tests for the pure-Python parts of tools.py: parsing FFmpeg output, choosing encoder settings and
+building FFmpeg commands and DASH manifests.
+FFmpeg and ffprobe are replaced by a fake `subprocess.run` that returns canned output, so these
+tests run without any media tools installed.
+
+Usage:
+    python -m pytest test_tools.py
+"""
+
+import subprocess
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+import tools
+from tools import (MPD_NAMESPACE, SCENE_RATE_TIERS, add_text_tracks_to_dash_manifest, analyze_scenes, choose_bitrate,
+                   compress_and_convert_to_dash, compress_and_convert_to_webm_adaptive)
+
+# Trimmed manifest as written by FFmpeg's DASH muxer
+SAMPLE_MPD = f'''<?xml version="1.0" encoding="utf-8"?>
+<MPD xmlns="{MPD_NAMESPACE}" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" type="static">
+    <Period id="0" start="PT0.0S">
+        <AdaptationSet id="0" contentType="video" segmentAlignment="true">
+            <Representation id="0" mimeType="video/webm" codecs="vp09.00.31.08" bandwidth="1500000" width="1280" height="720"/>
+        </AdaptationSet>
+        <AdaptationSet id="1" contentType="audio" segmentAlignment="true">
+            <Representation id="1" mimeType="audio/webm" codecs="opus" bandwidth="128000"/>
+        </AdaptationSet>
+    </Period>
+</MPD>
+'''
+
+
+class FakeRun:
+    """Stand-in for subprocess.run that records the commands and answers ffprobe and FFmpeg with canned output."""
+
+    def __init__(self, duration: float = 0.0, scene_output: str = '', audio_streams: str = '') -> None:
+        self.duration = duration
+        self.scene_output = scene_output
+        self.audio_streams = audio_streams
+        self.commands: List[List[str]] = []
+
+    def __call__(self, command: List[str], **kwargs) -> subprocess.CompletedProcess:
+        self.commands.append(command)
+        if command[0] == 'ffprobe' and 'format=duration' in command:
+            stdout = f"{self.duration}\n"
+        elif command[0] == 'ffprobe':
+            stdout = self.audio_streams
+        elif any('metadata=print' in arg for arg in command):
+            stdout = self.scene_output
+        else:
+            stdout = ''
+            Path(command[-1]).write_bytes(b'\0' * 1000)  # Encodes write their output file last
+        return subprocess.CompletedProcess(command, 0, stdout=stdout, stderr='')
+
+
+def scene_output(frames: List[Tuple[float, float]]) -> str:
+    """Builds the output of FFmpeg's metadata=print filter for (pts_time, scene score) pairs."""
+    lines = []
+    for i, (pts_time, score) in enumerate(frames):
+        lines.append(f"frame:{i}    pts:{int(pts_time * 1000)}  pts_time:{pts_time}")
+        lines.append(f"lavfi.scene_score={score:.6f}")
+    return '\n'.join(lines) + '\n'
+
+
+@pytest.fixture
+def video(tmp_path: Path) -> Path:
+    video = tmp_path / 'input.mp4'
+    video.write_text('video', encoding='utf-8')
+    return video
+
+
+def test_static_segment_after_slide_change_stays_in_lowest_tier(monkeypatch, video):
+    # 20 s of static slide, a slide change at 20 s, then 20 s of another static slide
+    frames = [(t / 2, 0.0) for t in range(1, 40)] + [(20.0, 0.9)] + [(t / 2, 0.0) for t in range(41, 80)]
+    monkeypatch.setattr(tools.subprocess, 'run', FakeRun(duration=40.0, scene_output=scene_output(frames)))
+    segments = analyze_scenes(video, scene_threshold=0.3, min_segment_duration=10.0)
+    assert [(s['start'], s['end']) for s in segments] == [(0.0, 20.0), (20.0, 40.0)]
+    # The score of the slide change itself is not part of the new segment
+    assert segments[1]['complexity'] == 0.0
+    assert choose_bitrate(segments[1]['complexity']) == SCENE_RATE_TIERS[0][1]
+
+
+def test_short_scenes_are_not_split(monkeypatch, video):
+    # Cuts every 2 s, like a live demo, must not produce segments shorter than min_segment_duration
+    frames = [(float(t), 0.5 if t % 2 == 0 else 0.05) for t in range(1, 30)]
+    monkeypatch.setattr(tools.subprocess, 'run', FakeRun(duration=30.0, scene_output=scene_output(frames)))
+    segments = analyze_scenes(video, scene_threshold=0.3, min_segment_duration=10.0)
+    assert [(s['start'], s['end']) for s in segments] == [(0.0, 10.0), (10.0, 20.0), (20.0, 30.0)]
+    assert all(s['end'] - s['start'] >= 10.0 for s in segments)
+
+
+def test_no_scene_changes_give_one_segment(monkeypatch, video):
+    frames = [(float(t), 0.01) for t in range(1, 15)]
+    monkeypatch.setattr(tools.subprocess, 'run', FakeRun(duration=15.0, scene_output=scene_output(frames)))
+    segments = analyze_scenes(video)
+    assert len(segments) == 1
+    assert segments[0]['start'] == 0.0 and segments[0]['end'] == 15.0
+    assert segments[0]['complexity'] == pytest.approx(0.01)
+
+
+def test_scene_change_near_the_end_is_not_split(monkeypatch, video):
+    frames = [(float(t), 0.0) for t in range(1, 25)] + [(25.0, 0.9), (26.0, 0.0)]
+    monkeypatch.setattr(tools.subprocess, 'run', FakeRun(duration=27.0, scene_output=scene_output(frames)))
+    assert len(analyze_scenes(video, min_segment_duration=10.0)) == 1
+
+
+def test_analyze_scenes_requires_existing_input(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        analyze_scenes(tmp_path / 'missing.mp4')
+
+
+@pytest.mark.parametrize('complexity, bitrate', [
+    (0.0, '200K'),  # Static slides
+    (0.002, '200K'),  # Tier limits are inclusive
+    (0.01, '600K'),  # Talking head
+    (0.5, '1200K'),  # Live demo
+])
+def test_choose_bitrate(complexity, bitrate):
+    assert choose_bitrate(complexity) == bitrate
+
+
+def test_adaptive_report_has_no_savings_unless_measured(monkeypatch, video, tmp_path):
+    frames = [(float(t), 0.0) for t in range(1, 20)]
+    fake_run = FakeRun(duration=20.0, scene_output=scene_output(frames))
+    monkeypatch.setattr(tools.subprocess, 'run', fake_run)
+    report = compress_and_convert_to_webm_adaptive(video, tmp_path / 'output.webm')
+    assert report[0]['bytes'] == 1000
+    assert report[0]['fixed_bytes'] is None and report[0]['bytes_saved'] is None
+
+    report = compress_and_convert_to_webm_adaptive(video, tmp_path / 'output.webm', measure_savings=True)
+    assert report[0]['fixed_bytes'] == 1000 and report[0]['bytes_saved'] == 0
+
+
+def test_text_tracks_are_added_to_dash_manifest(tmp_path):
+    manifest = tmp_path / 'video.mpd'
+    manifest.write_text(SAMPLE_MPD, encoding='utf-8')
+    add_text_tracks_to_dash_manifest(manifest, {'corrected': tmp_path / 'video.corrected.nld.vtt',
+                                                'raw': tmp_path / 'video.raw.nld.vtt'}, language='nld')
+
+    ns = {'mpd': MPD_NAMESPACE}
+    period = ET.parse(manifest).getroot().find('mpd:Period', ns)
+    adaptation_sets = period.findall('mpd:AdaptationSet', ns)
+    assert [a.get('id') for a in adaptation_sets] == ['0', '1', '2', '3']
+    text_sets = [a for a in adaptation_sets if a.get('contentType') == 'text']
+    assert [a.find('mpd:Label', ns).text for a in text_sets] == ['corrected', 'raw']
+    assert all(a.get('lang') == 'nld' and a.get('mimeType') == 'text/vtt' for a in text_sets)
+    assert text_sets[0].find('mpd:Representation/mpd:BaseURL', ns).text == 'video.corrected.nld.vtt'
+    # The existing sets and the default namespace are kept, so players still find the video and audio
+    assert manifest.read_text(encoding='utf-8').count('<MPD xmlns="') == 1
+    assert adaptation_sets[0].find('mpd:Representation', ns).get('width') == '1280'
+
+
+@pytest.mark.parametrize('audio_streams, adaptation_sets', [
+    ('1\n', 'id=0,streams=v id=1,streams=a'),  # Source with audio: video and audio adaptation sets
+    ('', 'id=0,streams=v'),  # Screen recording without audio: an audio set would make FFmpeg fail
+])
+def test_dash_adaptation_sets_follow_audio(monkeypatch, video, tmp_path, audio_streams, adaptation_sets):
+    fake_run = FakeRun(audio_streams=audio_streams)
+    monkeypatch.setattr(tools.subprocess, 'run', fake_run)
+    compress_and_convert_to_dash(video, tmp_path / 'dash' / 'video.mpd')
+    command = fake_run.commands[-1]
+    assert command[command.index('-adaptation_sets') + 1] == adaptation_sets
+    assert '0:a?' in command
+
+
+def test_dash_threads_are_split_between_renditions(monkeypatch, video, tmp_path):
+    fake_run = FakeRun(audio_streams='1\n')
+    monkeypatch.setattr(tools.subprocess, 'run', fake_run)
+    compress_and_convert_to_dash(video, tmp_path / 'video.mpd', threads=6,
+                                 renditions=[(1280, 720, '1500K'), (854, 480, '750K'), (640, 360, '400K')])
+    command = fake_run.commands[-1]
+    assert [command[i + 1] for i, arg in enumerate(command) if arg.startswith('-threads:v:')] == ['2', '2', '2']
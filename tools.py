@@ -10,6 +10,8 @@ Main functionalities:
 - `extract_audio`: Extracts the audio track from a video file and saves it as an audio file (e.g., MP3).
 - `amplify_audio`: Amplifies the volume of an audio file by a given factor.
 - `compress_and_convert_to_webm`: Compresses and converts MP4 video to WebM format for web-optimized video playback.
+- `compress_and_convert_to_webm_adaptive`: Like `compress_and_convert_to_webm`, but with per-scene bitrate settings for static slides and live demos.
+- `compress_and_convert_to_dash`: Encodes a video once into several WebM renditions with a DASH manifest for adaptive streaming.
 - `add_subtitles_to_video`: Embeds AI-corrected subtitles (SRT) into a video file, with options for toggling subtitles on/off.
 
 This module is designed to work with various file formats, particularly MP4 for videos and SRT for subtitle files.
@@ -22,6 +24,9 @@ Functions:
 - `extract_audio`: Extracts audio from a video file.
 - `amplify_audio`: Amplifies audio in a file by a specified factor.
 - `compress_and_convert_to_webm`: Compresses and converts a video to WebM format.
+- `analyze_scenes`: Splits a video into scenes and measures their visual complexity.
+- `compress_and_convert_to_webm_adaptive`: Compresses and converts a video to WebM with per-scene rate settings.
+- `compress_and_convert_to_dash`: Compresses and converts a video to segmented multi-rendition WebM with a DASH manifest.
 - `add_subtitles_to_video`: Adds subtitles to a video file.
 - Directory and file path management: Handles the creation of directories and file paths for processed media.
 
@@ -35,9 +40,36 @@ Author: Olaf Janssen (ookgezellig) - Supported by ChatGPT
 License: Creative Commons CC0 - http://creativecommons.org/publicdomain/zero/1.0
 """
 
+import json
+import re
 import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Union
+from typing import Dict, List, Optional, Tuple, Union
+
+from resources import run_tracked
+
+# Video renditions for adaptive (DASH) streaming: (width, height, video bitrate)
+DASH_RENDITIONS: List[Tuple[int, int, str]] = [
+    (640, 360, '250K'),
+    (854, 480, '400K'),
+    (1280, 720, '600K'),
+]
+DASH_SEGMENT_DURATION: int = 4  # Segment length in seconds; keyframes are forced at segment boundaries
+
+MPD_NAMESPACE = 'urn:mpeg:dash:schema:mpd:2011'
+
+# Per-scene bitrate caps for adaptive WebM encoding: (maximum complexity, video bitrate).
+# Complexity is the mean FFmpeg scene score between consecutive frames: ~0 for static slides, higher for live demos.
+# All tiers use the CRF of compress_and_convert_to_webm, so the quality target stays the same and only the cap moves.
+SCENE_RATE_TIERS: List[Tuple[float, str]] = [
+    (0.002, '200K'),  # Static slides
+    (0.02, '600K'),  # Talking head, slide transitions (the fixed settings of compress_and_convert_to_webm)
+    (float('inf'), '1200K'),  # Live screen demos, a lot of motion
+]
+WEBM_FIXED_BITRATE_KBPS: int = 600  # Video bitrate of compress_and_convert_to_webm
+WEBM_CRF: int = 60  # CRF of compress_and_convert_to_webm
 
 # Helper function to create directories
 def create_dir(path: Path) -> Path:
@@ -76,7 +108,7 @@ def extract_clip(input_video: Union[str, Path], start_time: str, duration: str,
 
     try:
         # Run FFmpeg command to extract the clip
-        subprocess.run(command, check=True)
+        run_tracked(command, check=True)
         print(f"Clip extracted successfully to {output_clip}")
     except subprocess.CalledProcessError as e:
         print(f"Error during clip extraction: {e}")
@@ -118,7 +150,7 @@ def enhance_audio_in_video(input_video: Union[str, Path], output_video: Union[st
 
     try:
         # Run the FFmpeg command to enhance the audio in the video
-        subprocess.run(command, check=True)
+        run_tracked(command, check=True)
         print(f"Audio enhancement completed successfully for {output_video}")
     except subprocess.CalledProcessError as e:
         print(f"Error during audio enhancement: {e}")
@@ -156,7 +188,7 @@ def extract_audio(input_video: Union[str, Path], output_audio: Union[str, Path])
 
     try:
         # Run FFmpeg command to extract audio
-        subprocess.run(command, check=True)
+        run_tracked(command, check=True)
         print(f"Audio extracted successfully to {output_audio}")
     except subprocess.CalledProcessError as e:
         print(f"Error during audio extraction: {e}")
@@ -194,7 +226,7 @@ def amplify_audio(input_audio: Union[str, Path], output_audio: Union[str, Path],
 
     try:
         # Run FFmpeg command to amplify the audio
-        subprocess.run(command, check=True)
+        run_tracked(command, check=True)
         print(f"Audio amplification completed successfully: {output_audio}")
     except subprocess.CalledProcessError as e:
         print(f"Error during audio amplification: {e}")
@@ -203,13 +235,15 @@ def amplify_audio(input_audio: Union[str, Path], output_audio: Union[str, Path],
         print(f"An unexpected error occurred: {e}")
         raise
 
-def compress_and_convert_to_webm(input_clip: Union[str, Path], output_webm: Union[str, Path]) -> None:
+def compress_and_convert_to_webm(input_clip: Union[str, Path], output_webm: Union[str, Path],
+                                 threads: Optional[int] = None) -> None:
     """
     Compresses and converts an MP4 video clip to WebM format, reducing the file size
     while maintaining acceptable video quality.
     Args:
         input_clip (Union[str, Path]): Path to the input MP4 video file.
         output_webm (Union[str, Path]): Path where the output WebM file will be saved.
+        threads (Optional[int]): Maximum number of encoder threads. Default is None (chosen by FFmpeg).
     Returns:
         None
     Raises:
@@ -235,10 +269,12 @@ def compress_and_convert_to_webm(input_clip: Union[str, Path], output_webm: Unio
         '-b:a', '128k',  # Set audio bitrate to 128 Kbps
         str(output_webm)  # Output WebM file
     ]
+    if threads:
+        command[-1:-1] = ['-threads', str(threads)]  # Limit the encoder to the CPU cores given to this job
 
     try:
         # Run the FFmpeg command to compress and convert the video to WebM
-        subprocess.run(command, check=True)
+        run_tracked(command, check=True)
         print(f"Compression and conversion completed successfully: {output_webm}")
     except subprocess.CalledProcessError as e:
         print(f"Error during compression and conversion: {e}")
@@ -248,6 +284,326 @@ def compress_and_convert_to_webm(input_clip: Union[str, Path], output_webm: Unio
         raise
 
 
+def has_audio_stream(input_file: Union[str, Path]) -> bool:
+    """Returns True if a media file contains at least one audio stream, using ffprobe."""
+    command = ['ffprobe', '-v', 'error', '-select_streams', 'a', '-show_entries', 'stream=index', '-of', 'csv=p=0', str(input_file)]
+    return bool(subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip())
+
+
+def get_duration(input_file: Union[str, Path]) -> float:
+    """Returns the duration of a media file in seconds, using ffprobe."""
+    command = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', str(input_file)]
+    return float(subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip())
+
+
+def analyze_scenes(input_clip: Union[str, Path], scene_threshold: float = 0.3,
+                   min_segment_duration: float = 10.0) -> List[Dict[str, float]]:
+    """
+    Splits a video into segments at scene changes and measures the visual complexity of each segment,
+    using FFmpeg's scene change score (the difference between consecutive frames, from 0 to 1).
+    Args:
+        input_clip (Union[str, Path]): Path to the input video file.
+        scene_threshold (float): Scene score above which a frame starts a new segment. Default is 0.3.
+        min_segment_duration (float): Minimum length of a segment in seconds, so that a burst of cuts
+            (e.g. during a demo) does not produce many tiny segments. Default is 10 seconds.
+    Returns:
+        List[Dict[str, float]]: Segments with 'start', 'end' (seconds) and 'complexity' (mean scene score,
+            without the score of the scene change that starts the segment).
+    Raises:
+        FileNotFoundError: If the input video file does not exist.
+        subprocess.CalledProcessError: If FFmpeg fails to execute the command.
+    """
+    input_clip = Path(input_clip)
+
+    # Check if the input file exists
+    if not input_clip.exists():
+        raise FileNotFoundError(f"Input video file {input_clip} does not exist.")
+
+    command = [
+        'ffmpeg',
+        '-i', str(input_clip),  # Input video file
+        '-vf', "scale=320:-2,select='gte(scene,0)',metadata=print:file=-",  # Print the scene score of every (downscaled) frame
+        '-an',  # Ignore the audio
+        '-f', 'null', '-'  # No output file
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+
+    # The output alternates between 'frame:... pts_time:<t>' and 'lavfi.scene_score=<score>' lines
+    frames = []
+    frame_time = None
+    for line in output.splitlines():
+        time_match = re.search(r'pts_time:([\d.]+)', line)
+        if time_match:
+            frame_time = float(time_match.group(1))
+        elif line.startswith('lavfi.scene_score=') and frame_time is not None:
+            frames.append((frame_time, float(line.split('=', 1)[1])))
+
+    duration = get_duration(input_clip)
+    segments = []
+    start, scores = 0.0, []
+    for frame_time, score in frames:
+        if score > scene_threshold and frame_time - start >= min_segment_duration and duration - frame_time >= min_segment_duration:
+            segments.append({'start': start, 'end': frame_time, 'complexity': sum(scores) / len(scores) if scores else 0.0})
+            start, scores = frame_time, []
+            continue  # The scene cut scores the change from the previous scene, not the content of the new one
+        scores.append(score)
+    segments.append({'start': start, 'end': duration, 'complexity': sum(scores) / len(scores) if scores else 0.0})
+    return segments
+
+
+def choose_bitrate(complexity: float) -> str:
+    """Returns the video bitrate cap of the first tier in SCENE_RATE_TIERS that fits the complexity."""
+    for max_complexity, bitrate in SCENE_RATE_TIERS:
+        if complexity <= max_complexity:
+            return bitrate
+    return SCENE_RATE_TIERS[-1][1]
+
+
+def compress_and_convert_to_webm_adaptive(input_clip: Union[str, Path], output_webm: Union[str, Path],
+                                          report_file: Optional[Union[str, Path]] = None,
+                                          scene_threshold: float = 0.3, min_segment_duration: float = 10.0,
+                                          measure_savings: bool = False, threads: Optional[int] = None) -> List[Dict[str, object]]:
+    """
+    Compresses and converts an MP4 video clip to WebM format like `compress_and_convert_to_webm`, but picks the
+    bitrate cap per scene: fewer bits for static slides, more for live screen demos. The video is split into
+    segments with `analyze_scenes`, every segment is encoded with the bitrate cap of its complexity tier
+    (see SCENE_RATE_TIERS) and the same CRF as `compress_and_convert_to_webm`, and the segments are concatenated.
+    The audio is encoded once for the whole video.
+    Args:
+        input_clip (Union[str, Path]): Path to the input MP4 video file.
+        output_webm (Union[str, Path]): Path where the output WebM file will be saved.
+        report_file (Optional[Union[str, Path]]): Path where a JSON report of the segments will be saved. Default is None.
+        scene_threshold (float): Scene score above which a new segment starts. Default is 0.3.
+        min_segment_duration (float): Minimum length of a segment in seconds. Default is 10 seconds.
+        measure_savings (bool): If True, also encode every segment with the fixed settings of
+            `compress_and_convert_to_webm` to measure the bytes saved. This doubles the encoding time.
+            If False, only the bytes of the adaptive segments are reported. Default is False.
+        threads (Optional[int]): Maximum number of encoder threads. Default is None (chosen by FFmpeg).
+    Returns:
+        List[Dict[str, object]]: Per segment: start, end, complexity, bitrate, bytes, fixed_bytes and bytes_saved.
+            fixed_bytes and bytes_saved are None unless `measure_savings` is True.
+    Raises:
+        FileNotFoundError: If the input video file does not exist.
+        subprocess.CalledProcessError: If FFmpeg fails to execute the command.
+    """
+    input_clip = Path(input_clip)
+    output_webm = Path(output_webm)
+
+    # Check if the input file exists
+    if not input_clip.exists():
+        raise FileNotFoundError(f"Input video file {input_clip} does not exist.")
+
+    def encode_segment(segment: Dict[str, object], bitrate: str, output_segment: Path) -> int:
+        # Same settings as compress_and_convert_to_webm, without audio and with the bitrate cap of the segment
+        command = [
+            'ffmpeg', '-y',
+            '-ss', str(segment['start']),  # Start of the segment (seeking before the input is fast)
+            '-i', str(input_clip),  # Input file
+            '-t', str(segment['end'] - segment['start']),  # Duration of the segment
+            '-c:v', 'libvpx-vp9',  # Use VP9 codec
+            '-b:v', bitrate,  # Video bitrate cap of the segment's complexity tier
+            '-crf', str(WEBM_CRF),  # Same quality target as compress_and_convert_to_webm
+            '-cpu-used', '8',  # Speed up the encoding with optimizations
+            '-vf', 'scale=1280:720',  # Downscale the video resolution to 720p
+            '-an',  # Audio is encoded once for the whole video
+            str(output_segment)
+        ]
+        if threads:
+            command[-1:-1] = ['-threads', str(threads)]  # Limit the encoder to the CPU cores given to this job
+        run_tracked(command, check=True)
+        return output_segment.stat().st_size
+
+    try:
+        segments = analyze_scenes(input_clip, scene_threshold, min_segment_duration)
+        print(f"Found {len(segments)} segment(s) in {input_clip}")
+
+        report = []
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_dir = Path(tmp)
+            segment_files = []
+            for i, segment in enumerate(segments):
+                bitrate = choose_bitrate(segment['complexity'])
+                segment_file = tmp_dir / f"segment{i:04d}.webm"
+                segment_bytes = encode_segment(segment, bitrate, segment_file)
+                segment_files.append(segment_file)
+
+                fixed_bytes = bytes_saved = None
+                if measure_savings:
+                    fixed_bytes = encode_segment(segment, f"{WEBM_FIXED_BITRATE_KBPS}K", tmp_dir / 'fixed.webm')
+                    bytes_saved = fixed_bytes - segment_bytes
+                report.append({**segment, 'bitrate': bitrate, 'bytes': segment_bytes,
+                               'fixed_bytes': fixed_bytes, 'bytes_saved': bytes_saved})
+
+            # Concatenate the video segments without re-encoding and add the audio of the full video
+            concat_list = tmp_dir / 'segments.txt'
+            concat_list.write_text(''.join(f"file '{f.as_posix()}'\n" for f in segment_files), encoding='utf-8')
+            command = [
+                'ffmpeg',
+                '-f', 'concat', '-safe', '0', '-i', str(concat_list),  # Encoded video segments
+                '-i', str(input_clip),  # Input file, for the audio
+                '-map', '0:v', '-map', '1:a?',  # Video from the segments, audio (if any) from the input
+                '-c:v', 'copy',  # Copy the video segments without re-encoding
+                '-c:a', 'libopus',  # Use Opus codec for better audio compression
+                '-b:a', '128k',  # Set audio bitrate to 128 Kbps
+                str(output_webm)  # Output WebM file
+            ]
+            if threads:
+                command[-1:-1] = ['-threads', str(threads)]  # Limit the encoder to the CPU cores given to this job
+            run_tracked(command, check=True)
+
+        # Report the size (and, if measured, the bytes saved) per segment
+        print(f"{'Segment':>7} {'Start':>9} {'End':>9} {'Complexity':>10} {'Bitrate':>8} {'Bytes':>11} {'Saved':>11}")
+        for i, segment in enumerate(report):
+            saved = segment['bytes_saved'] if measure_savings else '-'
+            print(f"{i:>7} {segment['start']:>9.2f} {segment['end']:>9.2f} {segment['complexity']:>10.4f} "
+                  f"{segment['bitrate']:>8} {segment['bytes']:>11} {saved:>11}")
+        print(f"Total bytes: {sum(segment['bytes'] for segment in report)}")
+        if measure_savings:
+            print(f"Total bytes saved: {sum(segment['bytes_saved'] for segment in report)}")
+        if report_file:
+            Path(report_file).write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+        print(f"Adaptive compression and conversion completed successfully: {output_webm}")
+        return report
+    except subprocess.CalledProcessError as e:
+        print(f"Error during adaptive compression and conversion: {e}")
+        raise
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        raise
+
+
+def compress_and_convert_to_dash(input_clip: Union[str, Path], output_manifest: Union[str, Path],
+                                 subtitle_files: Optional[Dict[str, Union[str, Path]]] = None,
+                                 renditions: List[Tuple[int, int, str]] = DASH_RENDITIONS,
+                                 language: str = 'eng', threads: Optional[int] = None) -> None:
+    """
+    Compresses and converts an MP4 video into several VP9 renditions plus one shared Opus audio track (if any),
+    written as segmented WebM with a DASH manifest (.mpd) for adaptive streaming. The source is decoded only once
+    and split into the different resolutions, so this is a single encode job. Subtitle files are converted to
+    WebVTT and added to the manifest as text tracks.
+    HLS is not supported, because HLS playlists cannot reference WebM segments.
+    Args:
+        input_clip (Union[str, Path]): Path to the input MP4 video file.
+        output_manifest (Union[str, Path]): Path where the DASH manifest (.mpd) will be saved.
+            The segments and subtitle files are saved in the same directory.
+        subtitle_files (Optional[Dict[str, Union[str, Path]]]): Subtitle files (SRT or WebVTT) by label,
+            e.g. {'corrected': corrected_srt_file, 'raw': raw_srt_file}. Default is None.
+        renditions (List[Tuple[int, int, str]]): Video renditions as (width, height, bitrate). Default is DASH_RENDITIONS.
+        language (str): Language code of the subtitles. Default is 'eng'.
+        threads (Optional[int]): Maximum number of encoder threads. Default is None (chosen by FFmpeg).
+    Returns:
+        None
+    Raises:
+        FileNotFoundError: If the input video file or a subtitle file does not exist.
+        subprocess.CalledProcessError: If FFmpeg fails to execute the command.
+    """
+    input_clip = Path(input_clip)
+    output_manifest = Path(output_manifest)
+    subtitle_files = {label: Path(file) for label, file in (subtitle_files or {}).items()}
+
+    # Check if the input files exist
+    if not input_clip.exists():
+        raise FileNotFoundError(f"Input video file {input_clip} does not exist.")
+    for subtitle_file in subtitle_files.values():
+        if not subtitle_file.exists():
+            raise FileNotFoundError(f"Subtitle file not found: {subtitle_file}")
+
+    output_manifest.parent.mkdir(parents=True, exist_ok=True)
+    stem = output_manifest.stem
+    adaptation_sets = 'id=0,streams=v id=1,streams=a' if has_audio_stream(input_clip) else 'id=0,streams=v'
+
+    # Decode once, split the video into one branch per rendition and scale each branch
+    split_outputs = ''.join(f"[v{i}]" for i in range(len(renditions)))
+    filters = [f"[0:v]split={len(renditions)}{split_outputs}"]
+    filters += [f"[v{i}]scale={width}:{height}[v{i}out]" for i, (width, height, _) in enumerate(renditions)]
+
+    command = [
+        'ffmpeg',  # Command starts here
+        '-i', str(input_clip),  # Input file
+        '-filter_complex', ';'.join(filters),  # One scaled video stream per rendition
+    ]
+    for i, (_, _, bitrate) in enumerate(renditions):
+        command += ['-map', f"[v{i}out]", f"-b:v:{i}", bitrate]  # Video rendition with its own bitrate
+    command += [
+        '-map', '0:a?',  # One shared audio track (if the source has audio)
+        '-c:v', 'libvpx-vp9',  # Use VP9 codec
+        '-crf', '60',  # Set high CRF for better compression (lower quality)
+        '-cpu-used', '8',  # Speed up the encoding with optimizations
+        '-force_key_frames', f"expr:gte(t,n_forced*{DASH_SEGMENT_DURATION})",  # Aligned keyframes, so renditions can be switched at every segment
+        '-c:a', 'libopus',  # Use Opus codec for better audio compression
+        '-b:a', '128k',  # Set audio bitrate to 128 Kbps
+        '-f', 'dash',  # DASH output: manifest plus segments
+        '-dash_segment_type', 'webm',  # Segmented WebM instead of MP4
+        '-seg_duration', str(DASH_SEGMENT_DURATION),
+        '-use_template', '1',
+        '-use_timeline', '1',
+        '-adaptation_sets', adaptation_sets,  # All video renditions in one adaptation set
+        '-init_seg_name', f"{stem}-init-$RepresentationID$.webm",
+        '-media_seg_name', f"{stem}-chunk-$RepresentationID$-$Number%05d$.webm",
+        str(output_manifest)  # Output DASH manifest
+    ]
+    if threads:
+        # -threads applies to every rendition encoder, so split the CPU cores given to this job between them
+        for i in range(len(renditions)):
+            command[-1:-1] = [f"-threads:v:{i}", str(max(1, threads // len(renditions)))]
+
+    try:
+        # Run the FFmpeg command to encode all renditions in one job
+        run_tracked(command, check=True)
+
+        # Convert the subtitles to WebVTT and add them to the manifest as text tracks
+        if subtitle_files:
+            vtt_files = {}
+            for label, subtitle_file in subtitle_files.items():
+                vtt_file = output_manifest.parent / f"{stem}.{label}.{language}.vtt"
+                run_tracked(['ffmpeg', '-y', '-i', str(subtitle_file), str(vtt_file)], check=True)
+                vtt_files[label] = vtt_file
+            add_text_tracks_to_dash_manifest(output_manifest, vtt_files, language)
+
+        print(f"DASH compression and conversion completed successfully: {output_manifest}")
+    except subprocess.CalledProcessError as e:
+        print(f"Error during DASH compression and conversion: {e}")
+        raise
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        raise
+
+
+def add_text_tracks_to_dash_manifest(manifest: Union[str, Path], vtt_files: Dict[str, Union[str, Path]],
+                                     language: str = 'eng') -> None:
+    """
+    Adds WebVTT subtitle files to a DASH manifest, each as a text adaptation set in the first period.
+    FFmpeg's DASH muxer does not write subtitle streams itself, so they are added as sidecar files.
+    Args:
+        manifest (Union[str, Path]): Path to the DASH manifest (.mpd) to update.
+        vtt_files (Dict[str, Union[str, Path]]): WebVTT files by label. They must be in the manifest's directory.
+        language (str): Language code of the subtitles. Default is 'eng'.
+    Returns:
+        None
+    """
+    manifest = Path(manifest)
+    ET.register_namespace('', MPD_NAMESPACE)
+    ET.register_namespace('xsi', 'http://www.w3.org/2001/XMLSchema-instance')
+    ET.register_namespace('xlink', 'http://www.w3.org/1999/xlink')
+    tree = ET.parse(manifest)
+    period = tree.getroot().find(f"{{{MPD_NAMESPACE}}}Period")
+
+    next_id = len(period.findall(f"{{{MPD_NAMESPACE}}}AdaptationSet"))
+    for i, (label, vtt_file) in enumerate(vtt_files.items()):
+        adaptation_set = ET.SubElement(period, f"{{{MPD_NAMESPACE}}}AdaptationSet", {
+            'id': str(next_id + i), 'contentType': 'text', 'mimeType': 'text/vtt', 'lang': language})
+        ET.SubElement(adaptation_set, f"{{{MPD_NAMESPACE}}}Role",
+                      {'schemeIdUri': 'urn:mpeg:dash:role:2011', 'value': 'subtitle'})
+        ET.SubElement(adaptation_set, f"{{{MPD_NAMESPACE}}}Label").text = label
+        representation = ET.SubElement(adaptation_set, f"{{{MPD_NAMESPACE}}}Representation",
+                                       {'id': f"subtitles-{label}", 'bandwidth': '256'})
+        ET.SubElement(representation, f"{{{MPD_NAMESPACE}}}BaseURL").text = Path(vtt_file).name
+
+    ET.indent(tree, space='\t')
+    tree.write(manifest, encoding='utf-8', xml_declaration=True)
+
+
 def add_subtitles_to_webm(input_video: Union[str, Path], subtitle_file: Union[str, Path],
                           output_video: Union[str, Path]) -> None:
     """
@@ -288,7 +644,7 @@ def add_subtitles_to_webm(input_video: Union[str, Path], subtitle_file: Union[st
     ]
     try:
         # Run FFmpeg command to add subtitles
-        subprocess.run(command, check=True)
+        run_tracked(command, check=True)
         print(f"Subtitles added successfully to: {output_video}")
 
     except subprocess.CalledProcessError as e:
@@ -21,12 +21,14 @@ Author: Olaf Janssen (ookgezellig) - Supported by ChatGPT
 License: Creative Commons CC0 - http://creativecommons.org/publicdomain/zero/1.0
 """
 
+import torch
 import whisper
 from whisper.utils import get_writer
 from pathlib import Path
 from typing import Dict, Optional
 
-def transcribe_audio(input_audio_path: Path, output_folder: Path, model_type: str, language: str = 'en', verbose: bool = True) -> None:
+def transcribe_audio(input_audio_path: Path, output_folder: Path, model_type: str, language: str = 'en', verbose: bool = True,
+                     threads: Optional[int] = None) -> None:
     """
     Transcribes an audio file using the Whisper model and saves the results in multiple formats.
     Args:
@@ -35,6 +37,8 @@ def transcribe_audio(input_audio_path: Path, output_folder: Path, model_type: st
         model_type (str): The Whisper ASR model ('large-v2' etc. )
         language (str): Language code for the transcription. Default is 'en'.
         verbose (bool): If True, print status updates and results to the console. Default is True.
+        threads (Optional[int]): Number of CPU threads torch may use. This setting applies to the whole process.
+            Default is None (all cores).
     Returns:
         None
     Raises:
@@ -42,6 +46,10 @@ def transcribe_audio(input_audio_path: Path, output_folder: Path, model_type: st
         Exception: For any other errors encountered during transcription.
     """
 
+    # Limit torch to the CPU cores given to this job
+    if threads:
+        torch.set_num_threads(threads)
+
     # Load the Whisper model
     model = whisper.load_model(model_type)
 